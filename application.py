@@ -0,0 +1,186 @@
+"""
+Application factory. create_app() wires the extensions, caches and
+instrumentation to a new Flask app and registers the public, admin and api
+blueprints; main.py and wsgi.py build the default app from it.
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from flask_migrate import stamp, upgrade
+from sqlalchemy import inspect
+from config import Config
+from extensions import migrate, login_manager
+from models import db, User, Property, Unit, UnitClosure, Booking
+from unit_hierarchy import rebuild_unit_closure
+from user_cache import user_cache
+from ical_cache import event_cache, invite_cache
+from feed_cache import create_feed_cache
+from booking_events import on_booking_changes_committed, on_bookings_committed, prune_booking_changes
+from live_updates import create_broker, publish_booking_changes
+from instrumentation import init_instrumentation
+from metrics import init_metrics, TimedQueuePool
+from db_routing import init_replica_routing
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+def create_app(config=Config):
+    app = Flask(__name__)
+    app.config.from_object(config)
+    logging.basicConfig(level=app.config['LOG_LEVEL'])
+
+    engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    if 'pool_size' in engine_options:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(engine_options, poolclass=TimedQueuePool)
+    db.init_app(app)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR)
+    login_manager.init_app(app)
+    user_cache.ttl = app.config['USER_CACHE_TTL']
+    invite_cache.max_entries = app.config['INVITE_CACHE_SIZE']
+    event_cache.max_entries = app.config['ICAL_EVENT_CACHE_SIZE']
+    app.extensions['feed_cache'] = create_feed_cache(app.config)
+    app.extensions['live_updates'] = create_broker(app.config)
+    init_instrumentation(app)
+    init_metrics(app, db)
+    init_replica_routing(app)
+
+    from blueprints.public import bp as public_bp
+    from blueprints.admin import bp as admin_bp
+    from blueprints.api import bp as api_bp
+    from blueprints.ical import bp as ical_bp
+    app.register_blueprint(public_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(ical_bp)
+
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(outbox_worker)
+    app.cli.add_command(prune_booking_changes_command)
+    return app
+
+@login_manager.user_loader
+def load_user(user_id):
+    return user_cache.get(int(user_id))
+
+@on_bookings_committed
+def invalidate_feed_cache(property_ids):
+    feed_cache = current_app.extensions['feed_cache']
+    for property_id in property_ids:
+        feed_cache.invalidate_property(property_id)
+
+@on_booking_changes_committed
+def push_booking_changes(changes):
+    publish_booking_changes(changes)
+
+def create_sample_data():
+    if User.query.first() is not None:
+        logger.info("Sample data already exists. Skipping creation.")
+        return
+    
+    logger.info("Creating sample data...")
+    try:
+        # Clear existing data
+        Booking.query.delete()
+        UnitClosure.query.delete()
+        Unit.query.delete()
+        Property.query.delete()
+        User.query.delete()
+        db.session.commit()
+        user_cache.invalidate()
+        
+        # db.session.query(Unit).delete()
+        # db.session.query(Property).delete()
+        # db.session.query(User).delete()
+        # db.session.commit() 
+
+        cbc = Property(name="CBC", description="Log Cabin, Pavilion, Deerfield, Kurth Annex, Kurth House")
+        cbm = Property(name="CBM", description="Firemeadow, Sunday House")
+        db.session.add_all([cbc, cbm])
+        db.session.commit()
+
+        cbc_units = [
+            Unit(name="Log Cabin", property_id=cbc.id),
+            Unit(name="Pavilion", property_id=cbc.id),
+            Unit(name="Deerfield", property_id=cbc.id),
+            Unit(name="Kurth Annex", property_id=cbc.id),
+            Unit(name="Kurth House", property_id=cbc.id)
+        ]
+        # Booking "Firemeadow - ALL" blocks every Firemeadow unit and vice versa
+        firemeadow_all = Unit(name="Firemeadow - ALL", property_id=cbm.id)
+        cbm_units = [
+            firemeadow_all,
+            Unit(name="Firemeadow - Main Lodge", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Firemeadow - Cabin 0", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Firemeadow - Cabin 1", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Firemeadow - Cabin 2", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Firemeadow - Cabin 3", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Firemeadow - Cabin 4", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Firemeadow - Cabin 5", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Firemeadow - Cabin 6", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Firemeadow - Meadowlark", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Firemeadow - Mariposa", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Firemeadow - Magnolia", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Firemeadow - Pinehurst", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Firemeadow - Montgomery", property_id=cbm.id, parent=firemeadow_all),
+            Unit(name="Sunday House", property_id=cbm.id)
+            
+        ]
+        db.session.add_all(cbc_units + cbm_units)
+        db.session.commit()
+        rebuild_unit_closure()
+        db.session.commit()
+
+        admin_user = User(username='admin')
+        admin_user.set_password(current_app.config['ADMIN_PASSPHRASE'])
+        regular_user = User(username='user')
+        regular_user.set_password(current_app.config['USER_PASSPHRASE'])
+        db.session.add_all([admin_user, regular_user])
+        db.session.commit()
+
+        logger.info("Sample data created successfully")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating sample data: {str(e)}")
+
+def init_db(app):
+    """
+    Bring the schema up to date, then add the sample data. An empty database
+    gets the current schema from the models and is stamped as migrated; an
+    existing one is upgraded, which is a single version lookup once it is
+    current.
+    """
+    with app.app_context():
+        if not inspect(db.engine).has_table(User.__tablename__):
+            db.create_all()
+            stamp()
+        else:
+            upgrade()
+        create_sample_data()
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create the schema on an empty database and add the sample data."""
+    init_db(current_app)
+
+@click.command('outbox-worker')
+@click.option('--once', is_flag=True, help='Deliver the emails that are due and exit.')
+@with_appcontext
+def outbox_worker(once):
+    """Deliver queued notification emails from the outbox."""
+    from outbox import run_worker
+
+    run_worker(once=once)
+
+@click.command('prune-booking-changes')
+@click.option('--days', type=int, help='Keep this many days of changes (default: BOOKING_CHANGES_RETENTION_DAYS).')
+@with_appcontext
+def prune_booking_changes_command(days):
+    """Delete old rows from the booking change log."""
+    days = current_app.config['BOOKING_CHANGES_RETENTION_DAYS'] if days is None else days
+    deleted = prune_booking_changes(datetime.utcnow() - timedelta(days=days))
+    click.echo(f"Deleted {deleted} booking change(s) older than {days} day(s).")
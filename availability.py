@@ -0,0 +1,131 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from models import db, Unit, Booking
+from unit_hierarchy import related_unit_ids, related_unit_ids_select
+
+# Statuses that occupy a unit. New requests may not overlap pending or
+# approved bookings; approving only has to avoid other approved bookings.
+BLOCKING_STATUSES = ('pending', 'approved')
+APPROVED_STATUSES = ('approved',)
+
+def booking_interval(booking):
+    """Return the (start, end) datetimes a booking occupies its unit."""
+    return (datetime.combine(booking.start_date, booking.arrival_time),
+            datetime.combine(booking.end_date, booking.departure_time))
+
+def lock_units(unit_ids) -> None:
+    """
+    Keep other writers off the units for the rest of the transaction, so two
+    concurrent requests that could collide cannot both pass the conflict
+    check. On Postgres this takes row locks on the units, in id order to
+    avoid deadlocks. SQLite has no row locks and runs a transaction's reads
+    before it holds any lock, so there the transaction is started with
+    BEGIN IMMEDIATE, which makes other writers wait until it commits.
+    """
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite':
+        # A transaction that has already written holds the write lock
+        if not connection.connection.dbapi_connection.in_transaction:
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+        return
+    db.session.query(Unit.id).filter(Unit.id.in_(unit_ids)).order_by(Unit.id).with_for_update().all()
+
+def lock_unit(unit_id: int) -> None:
+    """Lock the unit and the units it conflicts with; see lock_units()."""
+    lock_units(related_unit_ids_select(unit_id))
+
+def overlapping_bookings(unit_ids, start: datetime, end: datetime,
+                         statuses: Iterable[str] = BLOCKING_STATUSES,
+                         exclude_booking_id: Optional[int] = None) -> List[Booking]:
+    """
+    Bookings on any of the given units that overlap the [start, end) interval.
+    unit_ids may be a list or a SELECT of unit ids.
+
+    The date comparison runs as an indexed range query on
+    (unit_id, end_date, start_date). Status and the arrival and departure
+    times are checked in Python on the few rows in the window: a status
+    predicate tempts SQLite into the (status, start_date) index, which walks
+    the unit's whole history, and comparing times means same-day turnovers
+    do not count as conflicts.
+    """
+    statuses = set(statuses)
+    if not hasattr(unit_ids, 'subquery'):
+        unit_ids = list(unit_ids)
+    candidates = Booking.query.filter(
+        Booking.unit_id.in_(unit_ids),
+        Booking.start_date <= end.date(),
+        Booking.end_date >= start.date()
+    ).all()
+
+    conflicts = []
+    for booking in candidates:
+        if booking.status not in statuses or booking.id == exclude_booking_id:
+            continue
+        booking_start, booking_end = booking_interval(booking)
+        if booking_start < end and booking_end > start:
+            conflicts.append(booking)
+    return conflicts
+
+def find_conflicts(unit_id: int, start: datetime, end: datetime,
+                   statuses: Iterable[str] = BLOCKING_STATUSES,
+                   exclude_booking_id: Optional[int] = None, lock: bool = False) -> List[Booking]:
+    """
+    Bookings that prevent the unit from being booked between start and end,
+    including bookings of composite units containing it and of units it
+    contains. Pass lock=True when the caller is about to write based on the answer.
+    """
+    if lock:
+        lock_unit(unit_id)
+    return overlapping_bookings(related_unit_ids_select(unit_id), start, end, statuses, exclude_booking_id)
+
+def find_batch_conflicts(bookings: Iterable[Booking], statuses: Iterable[str] = APPROVED_STATUSES,
+                         lock: bool = False) -> Dict[int, List[Booking]]:
+    """
+    Conflicts for moving several bookings into an occupying status at once,
+    keyed by booking id, checked with one query for the whole batch.
+
+    Bookings are taken in (start_date, id) order and each one that is free
+    counts against the ones after it, so two overlapping requests in the same
+    batch cannot both pass. An empty list means the booking is clear.
+    """
+    bookings = sorted(bookings, key=lambda booking: (booking.start_date, booking.id))
+    if not bookings:
+        return {}
+    related = related_unit_ids({booking.unit_id for booking in bookings})
+    all_related = set().union(*related.values())
+    if lock:
+        lock_units(all_related)
+
+    intervals = {booking.id: booking_interval(booking) for booking in bookings}
+    window_start = min(start for start, _ in intervals.values())
+    window_end = max(end for _, end in intervals.values())
+    batch_ids = set(intervals)
+    occupied = [(other, booking_interval(other))
+                for other in overlapping_bookings(all_related, window_start, window_end, statuses)
+                if other.id not in batch_ids]
+
+    conflicts = {}
+    for booking in bookings:
+        start, end = intervals[booking.id]
+        conflicts[booking.id] = [
+            other for other, (other_start, other_end) in occupied
+            if other.unit_id in related[booking.unit_id] and other_start < end and other_end > start
+        ]
+        if not conflicts[booking.id]:
+            occupied.append((booking, (start, end)))
+    return conflicts
+
+def is_unit_available(unit_id: int, start: datetime, end: datetime,
+                      statuses: Iterable[str] = BLOCKING_STATUSES) -> bool:
+    """Whether the unit is free for the whole [start, end) interval."""
+    return not find_conflicts(unit_id, start, end, statuses)
+
+def available_units(property_id: int, start: datetime, end: datetime,
+                    statuses: Iterable[str] = BLOCKING_STATUSES) -> List[Unit]:
+    """Units of the property that are free for the whole [start, end) interval."""
+    units = Unit.query.filter_by(property_id=property_id).order_by(Unit.id).all()
+    related = related_unit_ids(unit.id for unit in units)
+    all_related = set().union(*related.values())
+    booked = {booking.unit_id for booking in
+              overlapping_bookings(all_related, start, end, statuses)}
+    return [unit for unit in units if not related[unit.id] & booked]
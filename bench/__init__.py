@@ -0,0 +1,8 @@
+"""Benchmarks. Each module is a script, run from the repo root:
+
+    python bench/datagen.py         build a synthetic data set
+    python bench/routes.py          throughput and latency of the main routes
+    python bench/servers.py         dev server against gunicorn, same workload
+    python bench/calendar_feed.py   calendar feed cost against growing history
+    python bench/availability.py    conflict check cost against growing history
+"""
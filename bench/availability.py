@@ -0,0 +1,47 @@
+"""Benchmark the availability conflict check against growing booking history.
+
+Times find_conflicts() and available_units() for a window at the recent end of
+a unit's history. Both run as indexed range queries, so their cost should
+depend on the bookings near the window rather than on the total history.
+
+Usage: python bench/availability.py [--sizes 1000 10000 50000] [--repeat 200]
+"""
+import argparse
+import time as timer
+from datetime import datetime, timedelta
+
+from datagen import app, reset_database  # also points the app at the bench DB
+from calendar_feed import WINDOW_END, seed_bookings
+from models import Unit
+from availability import find_conflicts, available_units
+
+def median_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = timer.perf_counter()
+        func()
+        samples.append(timer.perf_counter() - started)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    reset_database()
+
+    start = datetime.combine(WINDOW_END - timedelta(days=4), datetime.min.time())
+    end = start + timedelta(days=3)
+    print(f"{'history':>10} {'find_conflicts ms':>18} {'available_units ms':>19}")
+    with app.app_context():
+        for size in sorted(args.sizes):
+            property_id = seed_bookings(size)
+            unit_id = Unit.query.filter_by(property_id=property_id).first().id
+            conflicts = median_ms(lambda: find_conflicts(unit_id, start, end), args.repeat)
+            units = median_ms(lambda: available_units(property_id, start, end), args.repeat)
+            print(f'{size:>10} {conflicts:>18.3f} {units:>19.3f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark the /api/bookings/<property_id> calendar feed against growing history.
+
+Seeds the benchmark database (see datagen.py) with an increasing number of
+historical bookings and times a month-sized calendar window request at each
+size. With the date-windowed query the response time should stay roughly flat, because
+only the bookings overlapping the visible month are read and serialized.
+The feed cache is cleared before every timed request, so each one runs the query.
+
+Usage: python bench/calendar_feed.py [--sizes 1000 10000 50000] [--requests 50]
+"""
+import argparse
+import time as timer
+from datetime import date, timedelta
+
+from datagen import app, booking_row, insert_bookings, reset_database  # also points the app at the bench DB
+from feed_cache import get_feed_cache
+from models import Booking, Unit, Property
+
+WINDOW_START = date(2024, 6, 1)
+WINDOW_END = date(2024, 7, 1)
+
+def seed_bookings(total):
+    """Top the booking table up to `total` rows spread backwards from the window."""
+    units = Unit.query.join(Property).filter(Property.name == 'CBM').all()
+    existing = Booking.query.count()
+    rows = []
+    for i in range(existing, total):
+        # Each unit gets a back-to-back run of stays reaching further into the past.
+        start = WINDOW_END - timedelta(days=(i // len(units)) * 3 + 3)
+        rows.append(booking_row(i, units[i % len(units)].id, start, 2,
+                                'approved' if i % 3 else 'pending'))
+    insert_bookings(rows)
+    return units[0].property_id
+
+def time_requests(client, url, count):
+    samples = []
+    for _ in range(count):
+        get_feed_cache().clear()
+        started = timer.perf_counter()
+        response = client.get(url)
+        samples.append(timer.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+    samples.sort()
+    return samples[len(samples) // 2], len(response.get_json())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    reset_database()
+
+    client = app.test_client()
+    client.post('/login', data={'passphrase': app.config['ADMIN_PASSPHRASE']})
+
+    print(f"{'history':>10} {'windowed ms':>12} {'events':>7} {'full ms':>10} {'events':>7}")
+    with app.app_context():
+        for size in sorted(args.sizes):
+            property_id = seed_bookings(size)
+            windowed_url = (f'/api/bookings/{property_id}'
+                            f'?start={WINDOW_START.isoformat()}&end={WINDOW_END.isoformat()}')
+            windowed, windowed_events = time_requests(client, windowed_url, args.requests)
+            full, full_events = time_requests(client, f'/api/bookings/{property_id}',
+                                              max(1, args.requests // 10))
+            print(f'{size:>10} {windowed * 1000:>12.2f} {windowed_events:>7} '
+                  f'{full * 1000:>10.2f} {full_events:>7}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Synthetic data for the benchmarks.
+
+Importing this module points the app at the benchmark database: a throwaway
+SQLite file by default, or BENCH_DATABASE_URL (e.g. a local Postgres) when set.
+It must therefore be imported before `main`.
+
+generate() adds N properties with M units each on top of the regular sample
+data. Every property with three or more units gets a composite
+"<property> - ALL" unit over the others, like Firemeadow. K bookings are then
+spread over those units as back-to-back runs of short stays, mostly in the past
+and some up to six months ahead, with past stays approved or rejected and future
+ones pending or approved.
+
+Usage: python bench/datagen.py [--properties 5] [--units 8] [--bookings 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'bench.db')
+DATABASE_URL = os.environ.get('BENCH_DATABASE_URL', f'sqlite:///{DB_PATH}')
+os.environ['DATABASE_URL'] = DATABASE_URL
+os.environ.setdefault('ADMIN_PASSPHRASE', 'bench-admin')
+os.environ.setdefault('USER_PASSPHRASE', 'bench-user')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app, db, init_db  # noqa: E402
+from models import Booking, BookingChange, Property, Unit  # noqa: E402
+from unit_hierarchy import rebuild_unit_closure  # noqa: E402
+
+# How far ahead of today generated bookings reach
+HORIZON_DAYS = 180
+STAY_NIGHTS = [1, 2, 2, 2, 3, 3, 4, 7]
+GAP_DAYS = [0, 0, 1, 2, 3, 5, 7, 14]
+
+def reset_database():
+    """Drop everything in the benchmark database and recreate the sample data."""
+    if DATABASE_URL.startswith('sqlite:///'):
+        if os.path.exists(DB_PATH):
+            os.remove(DB_PATH)
+    else:
+        with app.app_context():
+            db.drop_all()
+    init_db()
+
+def booking_row(i, unit_id, start, nights, status):
+    """Column values for one synthetic booking, for a Core bulk insert."""
+    return dict(
+        unit_id=unit_id,
+        start_date=start,
+        end_date=start + timedelta(days=nights),
+        arrival_time=time(14, 0),
+        departure_time=time(11, 0),
+        guest_name=f'Guest {i}',
+        guest_email=f'guest{i}@example.com',
+        num_guests=1 + i % 12,
+        status=status,
+        catering_option='Catering' if i % 4 == 0 else 'Bring own food',
+        special_requests='',
+        mobility_impaired=i % 10 == 0,
+        event_manager_contact='Manager',
+        offsite_emergency_contact='Emergency',
+        mitchell_sponsor='Sponsor',
+        exclusive_use='Exclusive use' if i % 5 == 0 else 'Open to sharing',
+        organization_status='Personal use',
+    )
+
+def insert_bookings(rows, batch_size=5000):
+    """Bulk insert booking rows and bump the feed version of the properties they touch."""
+    for offset in range(0, len(rows), batch_size):
+        db.session.execute(Booking.__table__.insert(), rows[offset:offset + batch_size])
+    # Core inserts skip the ORM flush hook that normally bumps the version
+    # and writes the change log, so tell open calendars to reload instead
+    unit_ids = {row['unit_id'] for row in rows}
+    if unit_ids:
+        property_ids = [property_id for property_id, in
+                        db.session.query(Unit.property_id).filter(Unit.id.in_(unit_ids)).distinct()]
+        db.session.execute(
+            Property.__table__.update()
+            .where(Property.id.in_(property_ids))
+            .values(bookings_version=Property.bookings_version + 1, bookings_changed_at=datetime.utcnow())
+        )
+        db.session.execute(BookingChange.__table__.insert(), [
+            dict(property_id=property_id, booking_id=None, operation='reset', changed_at=datetime.utcnow())
+            for property_id in property_ids
+        ])
+    db.session.commit()
+
+def create_units(properties, units_per_property):
+    """Add the properties and their units; return the units that take bookings."""
+    units = []
+    for p in range(properties):
+        prop = Property(name=f'Bench Property {p}', description=f'{units_per_property} synthetic units')
+        db.session.add(prop)
+        composite = None
+        if units_per_property >= 3:
+            composite = Unit(name=f'Bench Property {p} - ALL', property=prop)
+            units.append(composite)
+        for u in range(units_per_property - (composite is not None)):
+            units.append(Unit(name=f'Bench Property {p} - Unit {u}', property=prop, parent=composite))
+    db.session.add_all(units)
+    db.session.commit()
+    rebuild_unit_closure()
+    db.session.commit()
+    return units
+
+def status_for(rng, start, today):
+    if start < today:
+        return 'approved' if rng.random() < 0.85 else 'rejected'
+    return 'pending' if rng.random() < 0.4 else 'approved'
+
+def generate(properties=5, units_per_property=8, bookings=20000, seed=0, today=None):
+    """Add the synthetic properties, units and bookings. Call inside an app context."""
+    rng = random.Random(seed)
+    today = today or date.today()
+    units = create_units(properties, units_per_property)
+
+    # Composite units are booked far less often than the units they cover
+    weights = [0.25 if unit.parent_unit_id is None and unit.children else 1.0 for unit in units]
+    quotas = [0] * len(units)
+    for index in rng.choices(range(len(units)), weights=weights, k=bookings):
+        quotas[index] += 1
+
+    rows = []
+    for unit, quota in zip(units, quotas):
+        # Walk backwards from the horizon so a unit never has overlapping stays
+        cursor = today + timedelta(days=HORIZON_DAYS)
+        for _ in range(quota):
+            nights = rng.choice(STAY_NIGHTS)
+            start = cursor - timedelta(days=nights + rng.choice(GAP_DAYS))
+            rows.append(booking_row(len(rows), unit.id, start, nights, status_for(rng, start, today)))
+            cursor = start
+    insert_bookings(rows)
+    return units
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--properties', type=int, default=5)
+    parser.add_argument('--units', type=int, default=8, help='units per property, including the composite')
+    parser.add_argument('--bookings', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    reset_database()
+    with app.app_context():
+        generate(args.properties, args.units, args.bookings, args.seed)
+        print(f'{Property.query.count()} properties, {Unit.query.count()} units, '
+              f'{Booking.query.count()} bookings in {DATABASE_URL}')
+
+if __name__ == '__main__':
+    main()
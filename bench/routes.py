@@ -0,0 +1,254 @@
+"""Measure throughput and latency percentiles of the main routes.
+
+Generates a synthetic data set (see datagen.py), then replays requests against
+get_bookings, property_details, admin, download_csv and book, either through the
+Flask test client or over HTTP against a running server (--url). The server
+must be using the same database, e.g. BENCH_DATABASE_URL=... for both, and
+--skip-generate keeps the data the server already has.
+
+Each route gets its own phase; book runs last because every booking it creates
+invalidates the cached calendar feed of its property. Results are written as
+JSON so runs can be compared.
+
+Usage: python bench/routes.py [--bookings 20000] [--requests 200] [--threads 1]
+                              [--url http://127.0.0.1:8000] [--output results.json]
+"""
+import argparse
+import http.cookiejar
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import re
+import subprocess
+import threading
+import time as timer
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, datetime, timedelta
+
+from datagen import DATABASE_URL, HORIZON_DAYS, app, db, generate, reset_database  # also points the app at the bench DB
+from models import Booking, Property, Unit
+from sqlalchemy import func
+
+ROUTES = ['get_bookings', 'property_details', 'admin', 'download_csv', 'book']
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+CSRF_PATTERN = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+class TestClientSession:
+    """One logged-in admin talking to the app in-process."""
+
+    def __init__(self):
+        self.client = app.test_client()
+        self.client.post('/login', data={'passphrase': app.config['ADMIN_PASSPHRASE']})
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        body = response.get_data()
+        return response.status_code, len(body)
+
+class HTTPSession:
+    """One logged-in admin talking to a real server, CSRF tokens included."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            NoRedirect()
+        )
+        self.csrf_token = self.fetch_csrf_token('/login')
+        self.request('POST', '/login', {'passphrase': app.config['ADMIN_PASSPHRASE']})
+        self.csrf_token = self.fetch_csrf_token('/book')
+
+    def fetch_csrf_token(self, path):
+        with self.opener.open(self.base_url + path) as response:
+            match = CSRF_PATTERN.search(response.read().decode())
+        return match.group(1) if match else None
+
+    def request(self, method, path, data=None):
+        if data is not None and self.csrf_token:
+            data = dict(data, csrf_token=self.csrf_token)
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        try:
+            with self.opener.open(urllib.request.Request(self.base_url + path, body, method=method)) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read())
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as they are, the way the test client does."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+class Workload:
+    """Builds the request each route phase replays, with randomised ids and dates."""
+
+    def __init__(self, property_ids, unit_ids, today, first_free_day):
+        self.property_ids = property_ids
+        self.unit_ids = unit_ids
+        self.today = today
+        self.first_free_day = first_free_day
+        self.next_booking = itertools.count()
+
+    def get_bookings(self, rng):
+        # A month somewhere between a year back and the end of the generated horizon
+        month = self.today.replace(day=1) + timedelta(days=31 * rng.randint(-12, HORIZON_DAYS // 31))
+        start = month.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        return 'GET', f'/api/bookings/{rng.choice(self.property_ids)}?start={start}&end={end}', None, 200
+
+    def property_details(self, rng):
+        return 'GET', f'/property/{rng.choice(self.property_ids)}', None, 200
+
+    def admin(self, rng):
+        return 'GET', '/admin', None, 200
+
+    def download_csv(self, rng):
+        return 'GET', '/admin/download_csv', None, 200
+
+    def book(self, rng):
+        # Every request books its own dates after the last existing stay, so none conflict
+        start = self.first_free_day + timedelta(days=3 * next(self.next_booking))
+        data = {
+            'unit_id': rng.choice(self.unit_ids),
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=2)).isoformat(),
+            'arrival_time': '14:00',
+            'departure_time': '11:00',
+            'guest_name': 'Bench Guest',
+            'guest_email': 'bench@example.com',
+            'num_guests': 4,
+            'catering_option': 'Bring own food',
+            'special_requests': '',
+            'mobility_impaired': 'No',
+            'event_manager_contact': 'Manager',
+            'offsite_emergency_contact': 'Emergency',
+            'mitchell_sponsor': 'Sponsor',
+            'exclusive_use': 'Open to sharing',
+            'organization_status': 'Personal use',
+        }
+        return 'POST', '/book', data, 302
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of sorted samples."""
+    index = max(0, math.ceil(pct * len(samples) / 100) - 1)
+    return samples[min(index, len(samples) - 1)]
+
+def run_route(route, workload, sessions, requests):
+    """Replay `requests` requests of one route across the sessions' threads."""
+    build = getattr(workload, route)
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    remaining = itertools.count()
+
+    def worker(session, seed):
+        rng = random.Random(seed)
+        while next(remaining) < requests:
+            method, path, data, expected = build(rng)
+            started = timer.perf_counter()
+            status, _ = session.request(method, path, data)
+            elapsed = timer.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if status != expected:
+                    errors.append(status)
+
+    threads = [threading.Thread(target=worker, args=(session, seed)) for seed, session in enumerate(sessions)]
+    started = timer.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = timer.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_statuses': sorted(set(errors)),
+        'seconds': round(wall, 3),
+        'throughput_rps': round(len(latencies) / wall, 2),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_workload():
+    """Point a Workload at the bench properties, or every property if there are none."""
+    with app.app_context():
+        property_ids = [p.id for p in Property.query.filter(Property.name.like('Bench Property %'))] \
+            or [p.id for p in Property.query]
+        unit_ids = [u.id for u in Unit.query.filter(Unit.property_id.in_(property_ids))]
+        last_end = db.session.query(func.max(Booking.end_date)).scalar()
+    first_free_day = max(last_end or date.today(), date.today()) + timedelta(days=1)
+    return Workload(property_ids, unit_ids, date.today(), first_free_day)
+
+def run_routes(routes, workload, sessions, requests):
+    """Run each route's phase in order, printing a row per route."""
+    results = {}
+    print(f"{'route':>17} {'req':>5} {'err':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for route in [route for route in ROUTES if route in routes]:
+        count = max(1, requests // 10) if route == 'download_csv' else requests
+        stats = results[route] = run_route(route, workload, sessions, count)
+        print(f"{route:>17} {stats['requests']:>5} {stats['errors']:>4} {stats['throughput_rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+    return results
+
+def write_report(name, output, args, **results):
+    report = {
+        'started_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'database': DATABASE_URL.split('://', 1)[0],
+        'args': vars(args),
+        **results
+    }
+    output = output or os.path.join(RESULTS_DIR, f"{name}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Results written to {output}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--properties', type=int, default=5)
+    parser.add_argument('--units', type=int, default=8, help='units per property, including the composite')
+    parser.add_argument('--bookings', type=int, default=20000)
+    parser.add_argument('--skip-generate', action='store_true', help='reuse the data already in the database')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route (download_csv gets a tenth)')
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--routes', nargs='+', choices=ROUTES, default=ROUTES)
+    parser.add_argument('--url', help='benchmark a running server instead of the test client')
+    parser.add_argument('--output', help='results file (default: bench/results/routes-<timestamp>.json)')
+    args = parser.parse_args()
+
+    if not args.skip_generate:
+        reset_database()
+        with app.app_context():
+            generate(args.properties, args.units, args.bookings)
+    workload = load_workload()
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    if args.url:
+        sessions = [HTTPSession(args.url) for _ in range(args.threads)]
+    else:
+        sessions = [TestClientSession() for _ in range(args.threads)]
+
+    results = run_routes(args.routes, workload, sessions, args.requests)
+    write_report('routes', args.output, args, target=args.url or 'test_client', routes=results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Compare the Werkzeug dev server with the production gunicorn setup.
+
+Generates a data set (see datagen.py), then starts each server in turn on the
+benchmark database and drives the same HTTP workload through it with several
+concurrent clients: `python main.py` (app.run) and `gunicorn -c
+gunicorn.conf.py` (preloaded gthread workers sized from the cores).
+
+Usage: python bench/servers.py [--bookings 20000] [--requests 200] [--threads 8]
+                               [--routes get_bookings property_details admin]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time as timer
+import urllib.error
+import urllib.request
+
+from datagen import DATABASE_URL, app, generate, reset_database  # also points the app at the bench DB
+from routes import ROUTES, HTTPSession, load_workload, run_routes, write_report
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVERS = {
+    'dev': [sys.executable, 'main.py'],
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+}
+
+def wait_for(url, timeout=30):
+    deadline = timer.monotonic() + timeout
+    while timer.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url).close()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            timer.sleep(0.2)
+    raise RuntimeError(f'{url} did not come up within {timeout}s')
+
+def start_server(name, port):
+    env = dict(os.environ, DATABASE_URL=DATABASE_URL, PORT=str(port), LOG_LEVEL='WARNING',
+               PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix='bench-metrics-'))
+    process = subprocess.Popen(SERVERS[name], cwd=REPO_ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(f'http://127.0.0.1:{port}/login')
+    except RuntimeError:
+        process.kill()
+        raise
+    return process
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--properties', type=int, default=5)
+    parser.add_argument('--units', type=int, default=8, help='units per property, including the composite')
+    parser.add_argument('--bookings', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=200, help='requests per route (download_csv gets a tenth)')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--routes', nargs='+', choices=ROUTES,
+                        default=['get_bookings', 'property_details', 'admin'])
+    parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--output', help='results file (default: bench/results/servers-<timestamp>.json)')
+    args = parser.parse_args()
+
+    reset_database()
+    with app.app_context():
+        generate(args.properties, args.units, args.bookings)
+    workload = load_workload()
+
+    results = {}
+    for name in args.servers:
+        print(f'\n{name}: {" ".join(SERVERS[name])}')
+        process = start_server(name, args.port)
+        try:
+            base_url = f'http://127.0.0.1:{args.port}'
+            sessions = [HTTPSession(base_url) for _ in range(args.threads)]
+            results[name] = run_routes(args.routes, workload, sessions, args.requests)
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+
+    if len(results) > 1:
+        print(f"\n{'route':>17} " + ' '.join(f'{name + " req/s":>14}' for name in results))
+        for route in next(iter(results.values())):
+            print(f'{route:>17} ' + ' '.join(f"{results[name][route]['throughput_rps']:>14.1f}"
+                                             for name in results))
+    write_report('servers', args.output, args, servers=results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Route blueprints: public pages and booking, the admin dashboard, the JSON api and the iCalendar feeds."""
@@ -0,0 +1,569 @@
+import logging
+from datetime import date, datetime, timedelta
+from functools import wraps
+from io import StringIO
+from flask import Blueprint, Response, current_app, flash, jsonify, redirect, render_template, request, stream_with_context, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import contains_eager
+from forms import NotificationEmailForm
+from models import db, Property, Unit, Booking, NotificationEmail, booking_with_unit_property
+from availability import find_conflicts, find_batch_conflicts, booking_interval, APPROVED_STATUSES
+from unit_hierarchy import rebuild_unit_closure
+from feed_cache import get_feed_cache
+from ical_cache import invite_cache
+from notifications import notify_admins, notify_guest
+from outbox import deliver_email
+from db_routing import read_only
+from live_updates import ADMIN_CHANNEL, stream_response
+from blueprints.api import parse_calendar_date
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('admin', __name__)
+
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated or current_user.username != 'admin':
+            flash('Access denied. Admin privileges required.', 'danger')
+            return redirect(url_for('public.index'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+def parse_admin_filters(args):
+    """Read the admin dashboard's property, unit and date range filters from query args."""
+    return {
+        'property_id': args.get('property_id', type=int),
+        'unit_id': args.get('unit_id', type=int),
+        'start': parse_calendar_date(args.get('start')),
+        'end': parse_calendar_date(args.get('end')),
+    }
+
+def parse_booking_cursor(value):
+    """Decode a "<start_date>_<id>" keyset cursor into a (date, id) pair."""
+    if not value:
+        return None
+    start_date, booking_id = value.split('_', 1)
+    return date.fromisoformat(start_date), int(booking_id)
+
+def admin_bookings_page(status, filters, after=None):
+    """
+    One page of bookings with the given status, ordered by (start_date, id).
+
+    Uses keyset pagination: `after` is the (start_date, id) of the last row
+    already shown, so each page is an index range scan on (status, start_date)
+    or (unit_id, status, start_date) however deep the admin pages.
+    Returns the bookings and the cursor for the next page, or None.
+    """
+    page_size = current_app.config['ADMIN_PAGE_SIZE']
+    query = booking_with_unit_property().filter(Booking.status == status)
+    if filters['unit_id']:
+        query = query.filter(Booking.unit_id == filters['unit_id'])
+    if filters['property_id']:
+        query = query.filter(Unit.property_id == filters['property_id'])
+    # Bookings overlapping [start, end]
+    if filters['start']:
+        query = query.filter(Booking.end_date >= filters['start'])
+    if filters['end']:
+        query = query.filter(Booking.start_date <= filters['end'])
+    if after:
+        query = query.filter(tuple_(Booking.start_date, Booking.id) > after)
+
+    bookings = query.order_by(Booking.start_date, Booking.id).limit(page_size + 1).all()
+    next_cursor = None
+    if len(bookings) > page_size:
+        bookings = bookings[:page_size]
+        last = bookings[-1]
+        next_cursor = f"{last.start_date.isoformat()}_{last.id}"
+    return bookings, next_cursor
+
+def admin_booking_json(booking):
+    return {
+        'id': booking.id,
+        'propertyId': booking.unit.property_id,
+        'unitId': booking.unit_id,
+        'property': booking.unit.property.name,
+        'unit': booking.unit.name,
+        'guestName': booking.guest_name,
+        'startDate': booking.start_date.isoformat(),
+        'endDate': booking.end_date.isoformat(),
+        'arrivalTime': booking.arrival_time.isoformat(),
+        'departureTime': booking.departure_time.isoformat(),
+        'guestEmail': booking.guest_email,
+        'numGuests': booking.num_guests,
+        'cateringOption': booking.catering_option,
+        'specialRequests': booking.special_requests,
+        'mobilityImpaired': 'Yes' if booking.mobility_impaired else 'No',
+        'eventManagerContact': booking.event_manager_contact,
+        'offsiteEmergencyContact': booking.offsite_emergency_contact,
+        'mitchellSponsor': booking.mitchell_sponsor,
+        'exclusiveUse': booking.exclusive_use,
+        'organizationStatus': booking.organization_status,
+        'status': booking.status
+    }
+
+@bp.route('/admin')
+@login_required
+@admin_required
+def dashboard():
+    try:
+        filters = parse_admin_filters(request.args)
+    except ValueError:
+        flash('Invalid date filter.', 'error')
+        return redirect(url_for('admin.dashboard'))
+    pending_bookings, pending_cursor = admin_bookings_page('pending', filters)
+    approved_bookings, approved_cursor = admin_bookings_page('approved', filters)
+    email_form = NotificationEmailForm()
+    notification_emails = NotificationEmail.query.all()
+    properties = Property.query.all()
+    units = Unit.query.join(Unit.property).options(contains_eager(Unit.property)).order_by(Property.name, Unit.name).all()
+    return render_template('admin.html', pending_bookings=pending_bookings, approved_bookings=approved_bookings,
+                           pending_cursor=pending_cursor, approved_cursor=approved_cursor, filters=filters,
+                           email_form=email_form, notification_emails=notification_emails,
+                           properties=properties, units=units)
+
+@bp.route('/admin/bookings')
+@login_required
+@admin_required
+def admin_bookings():
+    status = request.args.get('status', 'pending')
+    if status not in ('pending', 'approved', 'rejected'):
+        return jsonify({'error': 'Unknown booking status.'}), 400
+    try:
+        filters = parse_admin_filters(request.args)
+        after = parse_booking_cursor(request.args.get('after'))
+    except ValueError:
+        return jsonify({'error': 'Invalid filter or cursor.'}), 400
+
+    try:
+        bookings, next_cursor = admin_bookings_page(status, filters, after)
+        return jsonify({
+            'bookings': [admin_booking_json(booking) for booking in bookings],
+            'next': next_cursor
+        })
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while fetching admin bookings: {str(e)}")
+        return jsonify({'error': 'An error occurred while fetching bookings. Please try again later.'}), 500
+
+@bp.route('/admin/bookings/<int:booking_id>')
+@login_required
+@admin_required
+def admin_booking(booking_id):
+    booking = booking_with_unit_property().filter(Booking.id == booking_id).first()
+    if booking is None:
+        return jsonify({'error': 'Booking not found.'}), 404
+    return jsonify(admin_booking_json(booking))
+
+@bp.route('/admin/events')
+@login_required
+@admin_required
+def admin_events():
+    """Server-Sent Events announcing committed booking changes, for the admin queue."""
+    return stream_response(ADMIN_CHANNEL)
+
+@bp.route('/admin/add_notification_email', methods=['POST'])
+@login_required
+@admin_required
+def add_notification_email():
+    form = NotificationEmailForm()
+    if form.validate_on_submit():
+        try:
+            email = NotificationEmail(email=form.email.data)
+            db.session.add(email)
+            db.session.commit()
+            flash('Notification email added successfully')
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Database error while adding notification email: {str(e)}")
+            flash('An error occurred while adding the notification email. Please try again later.', 'error')
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Unexpected error while adding notification email: {str(e)}")
+            flash('An unexpected error occurred. Please try again later.', 'error')
+    return redirect(url_for('admin.dashboard'))
+
+@bp.route('/admin/remove_notification_email/<int:email_id>')
+@login_required
+@admin_required
+def remove_notification_email(email_id):
+    try:
+        email = NotificationEmail.query.get_or_404(email_id)
+        db.session.delete(email)
+        db.session.commit()
+        flash('Notification email removed successfully')
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"Database error while removing notification email: {str(e)}")
+        flash('An error occurred while removing the notification email. Please try again later.', 'error')
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Unexpected error while removing notification email: {str(e)}")
+        flash('An unexpected error occurred. Please try again later.', 'error')
+    return redirect(url_for('admin.dashboard'))
+
+@bp.route('/approve/<int:booking_id>', methods=['POST'])
+@login_required
+@admin_required
+def approve_booking(booking_id):
+    try:
+        booking = booking_with_unit_property().filter(Booking.id == booking_id).first_or_404()
+        start, end = booking_interval(booking)
+        conflicts = find_conflicts(booking.unit_id, start, end, statuses=APPROVED_STATUSES,
+                                   exclude_booking_id=booking.id, lock=True)
+        if conflicts:
+            db.session.rollback()
+            logger.info(f"Cannot approve booking {booking_id}: conflicts with approved booking(s) {[b.id for b in conflicts]}")
+            return jsonify({'error': 'This booking overlaps an approved booking for the same unit.'}), 409
+
+        booking.status = 'approved'
+        
+        logger.debug(f"Queueing guest notification for booking {booking_id}")
+        guest_notified = notify_guest(booking)
+        db.session.commit()
+        
+        if not guest_notified:
+            logger.warning(f"Failed to queue some notifications for booking {booking_id}")
+            flash('Booking approved, but there was an issue sending notifications.', 'warning')
+        else:
+            flash('Booking approved and notifications queued.', 'success')
+        
+        return jsonify({
+            'id': booking.id,
+            'title': f'{booking.guest_name} - {booking.unit.name}',
+            'color': '#378006',
+            'status': 'approved',
+            'booking': admin_booking_json(booking)
+        })
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"Database error while approving booking: {str(e)}")
+        return jsonify({'error': 'An error occurred while approving the booking. Please try again later.'}), 500
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Unexpected error while approving booking: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred. Please try again later.'}), 500
+
+@bp.route('/reject/<int:booking_id>')
+@login_required
+@admin_required
+def reject_booking(booking_id):
+    try:
+        booking = booking_with_unit_property().filter(Booking.id == booking_id).first_or_404()
+        booking.status = 'rejected'
+        guest_notified = notify_guest(booking)
+        db.session.commit()
+        
+        if guest_notified:
+            flash('Booking rejected and guest notification queued.', 'success')
+        else:
+            flash('Booking rejected, but there was an issue notifying the guest.', 'warning')
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"Database error while rejecting booking: {str(e)}")
+        flash('An error occurred while rejecting the booking. Please try again later.', 'error')
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Unexpected error while rejecting booking: {str(e)}")
+        flash('An unexpected error occurred. Please try again later.', 'error')
+    return redirect(url_for('admin.dashboard'))
+
+BULK_ACTIONS = {'approve': 'approved', 'reject': 'rejected'}
+
+@bp.route('/admin/bookings/bulk', methods=['POST'])
+@login_required
+@admin_required
+def bulk_update_bookings():
+    """
+    Approve or reject several pending bookings in one transaction.
+
+    Expects {"action": "approve" | "reject", "ids": [...]}. Conflicts for the
+    whole batch are checked with one query under one set of unit locks, and
+    the guest notifications are queued in the outbox in the same commit, for
+    the worker to deliver over a single SMTP connection. Bookings that cannot
+    be changed are reported in `errors` and left as they are.
+    """
+    payload = request.get_json(silent=True) or {}
+    status = BULK_ACTIONS.get(payload.get('action'))
+    try:
+        booking_ids = {int(booking_id) for booking_id in payload.get('ids') or []}
+    except (TypeError, ValueError):
+        booking_ids = None
+    if not status or not booking_ids:
+        return jsonify({'error': 'Expected an action of approve or reject and a list of booking ids.'}), 400
+
+    try:
+        bookings = booking_with_unit_property().filter(
+            Booking.id.in_(booking_ids), Booking.status == 'pending'
+        ).all()
+        errors = {booking_id: 'Booking not found or no longer pending.'
+                  for booking_id in booking_ids - {booking.id for booking in bookings}}
+
+        if status == 'approved':
+            conflicts = find_batch_conflicts(bookings, lock=True)
+            for booking in bookings:
+                if conflicts[booking.id]:
+                    logger.info(f"Cannot approve booking {booking.id}: conflicts with approved booking(s) "
+                                f"{[b.id for b in conflicts[booking.id]]}")
+                    errors[booking.id] = 'This booking overlaps an approved booking for the same unit.'
+            bookings = [booking for booking in bookings if not conflicts[booking.id]]
+
+        unnotified = []
+        for booking in bookings:
+            booking.status = status
+            if not notify_guest(booking):
+                unnotified.append(booking.id)
+        db.session.commit()
+
+        if unnotified:
+            logger.warning(f"Failed to queue guest notifications for bookings {unnotified}")
+        logger.info(f"Bulk {payload['action']}: {len(bookings)} updated, {len(errors)} skipped")
+        return jsonify({
+            'updated': [admin_booking_json(booking) for booking in bookings],
+            'errors': {str(booking_id): message for booking_id, message in sorted(errors.items())},
+            'unnotified': unnotified
+        })
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"Database error while updating bookings in bulk: {str(e)}")
+        return jsonify({'error': 'An error occurred while updating the bookings. Please try again later.'}), 500
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Unexpected error while updating bookings in bulk: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred. Please try again later.'}), 500
+
+@bp.route('/admin/cache_stats')
+@login_required
+@admin_required
+def cache_stats():
+    return jsonify({'feed_cache': get_feed_cache().stats(), 'invite_cache': invite_cache.stats()})
+
+@bp.route('/admin/database', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def admin_database():
+    if request.method == 'POST':
+        operation = request.form.get('operation')
+        if operation == 'add_property':
+            name = request.form.get('property_name')
+            description = request.form.get('property_description')
+            new_property = Property(name=name, description=description)
+            db.session.add(new_property)
+            db.session.commit()
+            flash('Property added successfully', 'success')
+        elif operation == 'add_unit':
+            property_id = request.form.get('property_id')
+            unit_name = request.form.get('unit_name')
+            parent_unit_id = request.form.get('parent_unit_id') or None
+            new_unit = Unit(name=unit_name, property_id=property_id, parent_unit_id=parent_unit_id)
+            db.session.add(new_unit)
+            db.session.flush()
+            rebuild_unit_closure()
+            db.session.commit()
+            flash('Unit added successfully', 'success')
+        elif operation == 'delete_property':
+            property_id = request.form.get('property_id')
+            property_to_delete = Property.query.get(property_id)
+            if property_to_delete:
+                db.session.delete(property_to_delete)
+                db.session.commit()
+                flash('Property deleted successfully', 'success')
+            else:
+                flash('Property not found', 'error')
+        elif operation == 'delete_unit':
+            unit_id = request.form.get('unit_id')
+            unit_to_delete = Unit.query.get(unit_id)
+            if unit_to_delete:
+                # Units inside a deleted composite unit move up to its parent
+                Unit.query.filter_by(parent_unit_id=unit_to_delete.id).update(
+                    {'parent_unit_id': unit_to_delete.parent_unit_id})
+                db.session.delete(unit_to_delete)
+                db.session.flush()
+                rebuild_unit_closure()
+                db.session.commit()
+                flash('Unit deleted successfully', 'success')
+            else:
+                flash('Unit not found', 'error')
+    
+    properties = Property.query.all()
+    units = Unit.query.all()
+    return render_template('admin_database.html', properties=properties, units=units)
+
+@bp.route('/test_email')
+@login_required
+@admin_required
+def test_email():
+    try:
+        test_unit = Unit.query.first()
+        if not test_unit:
+            return "No units available for testing", 400
+
+        test_booking = Booking(
+            unit_id=test_unit.id,
+            start_date=date.today() + timedelta(days=7),
+            end_date=date.today() + timedelta(days=10),
+            arrival_time=datetime.now().time(),
+            departure_time=(datetime.now() + timedelta(hours=3)).time(),
+            guest_name="Test Guest",
+            guest_email=current_app.config['MAIL_USERNAME'],
+            num_guests=2,
+            catering_option="Bring own food",
+            special_requests="Test request",
+            mobility_impaired=False,
+            event_manager_contact="Test Manager",
+            offsite_emergency_contact="Test Emergency",
+            mitchell_sponsor="Test Sponsor",
+            exclusive_use="Open to sharing",
+            organization_status="Personal use",
+            status='approved'
+        )
+        db.session.add(test_booking)
+        db.session.flush()
+
+        # Deliver right away rather than waiting for the outbox worker, so the
+        # result of the SMTP round trip is reported back.
+        message = notify_guest(test_booking)
+        delivered = bool(message) and deliver_email(message)
+        db.session.commit()
+        if delivered:
+            return "Test email with calendar invite sent successfully. Please check your inbox."
+        else:
+            return "Failed to send test email", 500
+
+    except Exception as e:
+        logger.error(f"Failed to send test email: {str(e)}")
+        return f"Failed to send test email: {str(e)}", 500
+
+CSV_HEADER = ['ID', 'Property', 'Unit', 'Guest Name', 'Start Date', 'End Date', 'Arrival Time', 'Departure Time', 'Guest Email', 'Number of Guests', 'Status', 'Catering Option', 'Special Requests', 'Mobility Impaired', 'Event Manager Contact', 'Offsite Emergency Contact', 'Mitchell Sponsor', 'Exclusive Use', 'Organization Status']
+CSV_BATCH_SIZE = 500
+
+def csv_rows(bookings):
+    """Yield the CSV export in chunks of CSV_BATCH_SIZE rows."""
+    import csv  # only the export needs it
+
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_HEADER)
+
+    for count, booking in enumerate(bookings, start=1):
+        writer.writerow([
+            booking.id,
+            booking.unit.property.name,
+            booking.unit.name,
+            booking.guest_name,
+            booking.start_date,
+            booking.end_date,
+            booking.arrival_time,
+            booking.departure_time,
+            booking.guest_email,
+            booking.num_guests,
+            booking.status,
+            booking.catering_option,
+            booking.special_requests,
+            'Yes' if booking.mobility_impaired else 'No',
+            booking.event_manager_contact,
+            booking.offsite_emergency_contact,
+            booking.mitchell_sponsor,
+            booking.exclusive_use,
+            booking.organization_status
+        ])
+        if count % CSV_BATCH_SIZE == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue()
+
+@bp.route('/admin/download_csv')
+@login_required
+@admin_required
+@read_only
+def download_csv():
+    try:
+        start = parse_calendar_date(request.args.get('start'))
+        end = parse_calendar_date(request.args.get('end'))
+        property_id = request.args.get('property_id', type=int)
+        status = request.args.get('status')
+    except ValueError:
+        flash('Invalid date range for the CSV export.', 'error')
+        return redirect(url_for('admin.dashboard'))
+
+    try:
+        query = booking_with_unit_property()
+        # Bookings overlapping [start, end]
+        if start:
+            query = query.filter(Booking.end_date >= start)
+        if end:
+            query = query.filter(Booking.start_date <= end)
+        if status:
+            query = query.filter(Booking.status == status)
+        if property_id:
+            query = query.filter(Unit.property_id == property_id)
+        # Rows are fetched from a server-side cursor in batches and written
+        # out as they arrive, so memory does not grow with the export size.
+        bookings = query.order_by(Booking.id).yield_per(CSV_BATCH_SIZE)
+
+        return Response(stream_with_context(csv_rows(bookings)),
+                        mimetype='text/csv',
+                        headers={'Content-Disposition': 'attachment; filename=bookings.csv'})
+    except Exception as e:
+        logger.error(f"Error generating CSV: {str(e)}")
+        flash('An error occurred while generating the CSV file.', 'error')
+        return redirect(url_for('admin.dashboard'))
+
+@bp.route('/delete_booking/<int:booking_id>', methods=['POST'])
+@login_required
+@admin_required
+def delete_booking(booking_id):
+    try:
+        booking = Booking.query.get_or_404(booking_id)
+        db.session.delete(booking)
+        db.session.commit()
+        return jsonify({'success': True, 'message': 'Booking deleted successfully'})
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error deleting booking: {str(e)}")
+        return jsonify({'success': False, 'message': 'An error occurred while deleting the booking'}), 500
+
+@bp.route('/test_admin_email')
+@login_required
+@admin_required
+def test_admin_email():
+    try:
+        test_unit = Unit.query.first()
+        if not test_unit:
+            return "No units available for testing", 400
+
+        test_booking = Booking(
+            unit_id=test_unit.id,
+            start_date=date.today() + timedelta(days=7),
+            end_date=date.today() + timedelta(days=10),
+            arrival_time=datetime.now().time(),
+            departure_time=(datetime.now() + timedelta(hours=3)).time(),
+            guest_name="Test Guest",
+            guest_email="ernesto.humpierres@gmail.com",
+            num_guests=2,
+            catering_option="Test Catering",
+            special_requests="Test request",
+            mobility_impaired=False,
+            event_manager_contact="Test Manager",
+            offsite_emergency_contact="Test Emergency",
+            mitchell_sponsor="Test Sponsor",
+            exclusive_use="Test Use",
+            organization_status="Test Status",
+            status='pending'
+        )
+
+        # Don't save to database, just test notification
+        logger.info("Testing admin notification with test booking")
+        message = notify_admins(test_booking)
+        delivered = bool(message) and deliver_email(message)
+        db.session.commit()
+        if delivered:
+            return "Test admin notification sent successfully. Please check admin email(s)."
+        else:
+            return "Failed to send test admin notification. Check logs for details.", 500
+
+    except Exception as e:
+        logger.error(f"Failed to send test admin email: {str(e)}", exc_info=True)
+        return f"Failed to send test admin email: {str(e)}", 500
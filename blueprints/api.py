@@ -0,0 +1,189 @@
+import logging
+from datetime import date, timezone
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user, login_required
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, Property, Unit, Booking, BookingChange, booking_with_unit_property
+from feed_cache import get_feed_cache
+from db_routing import read_only
+from live_updates import property_channel, stream_response
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('api', __name__)
+
+def parse_calendar_date(value):
+    """Parse a FullCalendar start/end parameter (ISO date or datetime) into a date."""
+    if not value:
+        return None
+    return date.fromisoformat(value[:10])
+
+def booking_event_json(booking):
+    """Compact FullCalendar event: just what the calendar needs to draw it."""
+    return {
+        'id': booking.id,
+        'title': f'{"PENDING - " if booking.status == "pending" else ""}{booking.guest_name} - {booking.unit.name}',
+        'start': f"{booking.start_date.isoformat()}T{booking.arrival_time.isoformat()}",
+        'end': f"{booking.end_date.isoformat()}T{booking.departure_time.isoformat()}",
+        'status': booking.status
+    }
+
+def booking_details_json(booking):
+    """FullCalendar event with every booking detail, for administrators."""
+    return {
+        **booking_event_json(booking),
+        'color': '#a8d08d' if booking.status == 'pending' else '#378006',
+        'guestName': booking.guest_name,
+        'guestEmail': booking.guest_email,
+        'numGuests': booking.num_guests,
+        'arrivalTime': booking.arrival_time.strftime('%H:%M'),
+        'departureTime': booking.departure_time.strftime('%H:%M'),
+        'cateringOption': booking.catering_option,
+        'specialRequests': booking.special_requests,
+        'mobilityImpaired': 'Yes' if booking.mobility_impaired else 'No',
+        'eventManagerContact': booking.event_manager_contact,
+        'offsiteEmergencyContact': booking.offsite_emergency_contact,
+        'mitchellSponsor': booking.mitchell_sponsor,
+        'exclusiveUse': booking.exclusive_use,
+        'organizationStatus': booking.organization_status
+    }
+
+def calendar_cache_headers(response, etag, last_modified):
+    """Validators for the calendar feed; clients must revalidate before reusing it."""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@bp.route('/api/bookings/<int:property_id>')
+@login_required
+@read_only
+def get_bookings(property_id):
+    try:
+        try:
+            window_start = parse_calendar_date(request.args.get('start'))
+            window_end = parse_calendar_date(request.args.get('end'))
+        except ValueError:
+            return jsonify({'error': 'Invalid start or end date.'}), 400
+
+        # The property's change version identifies the feed's content, so a
+        # client holding the current version gets a 304 before any booking is read.
+        version = db.session.query(Property.bookings_version, Property.bookings_changed_at).filter(
+            Property.id == property_id
+        ).first()
+        if version is None:
+            return jsonify({'error': 'Property not found.'}), 404
+        # Everyone gets compact events; administrators can ask for the full
+        # details inline, otherwise they load per booking from /api/booking/<id>.
+        is_admin = current_user.username == 'admin'
+        variant = 'full' if is_admin and request.args.get('details') == '1' else 'compact'
+        etag = f"property-{property_id}-v{version.bookings_version}-{variant}"
+        last_modified = version.bookings_changed_at.replace(tzinfo=timezone.utc) if version.bookings_changed_at else None
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(etag)
+        else:
+            not_modified = bool(last_modified and request.if_modified_since
+                                and last_modified.replace(microsecond=0) <= request.if_modified_since)
+        if not_modified:
+            response = current_app.response_class(status=304)
+            return calendar_cache_headers(response, etag, last_modified)
+
+        cache_key = (property_id, version.bookings_version, window_start, window_end, variant)
+        body = get_feed_cache().get(cache_key)
+        if body is not None:
+            response = current_app.response_class(body, mimetype='application/json')
+            return calendar_cache_headers(response, etag, last_modified)
+
+        query = booking_with_unit_property().filter(
+            Unit.property_id == property_id,
+            Booking.status != 'rejected'
+        )
+        # FullCalendar sends the visible range with an exclusive end, so only
+        # bookings overlapping [start, end) are needed for the current view.
+        if window_end:
+            query = query.filter(Booking.start_date < window_end)
+        if window_start:
+            query = query.filter(Booking.end_date >= window_start)
+        bookings = query.all()
+        serialize = booking_details_json if variant == 'full' else booking_event_json
+        response = jsonify([serialize(booking) for booking in bookings])
+        get_feed_cache().set(cache_key, response.get_data())
+        return calendar_cache_headers(response, etag, last_modified)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while fetching bookings: {str(e)}")
+        return jsonify({'error': 'An error occurred while fetching bookings. Please try again later.'}), 500
+    except Exception as e:
+        logger.error(f"Unexpected error while fetching bookings: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred. Please try again later.'}), 500
+
+@bp.route('/api/bookings/<int:property_id>/changes')
+@login_required
+@read_only
+def get_booking_changes(property_id):
+    """
+    Bookings of the property inserted, updated or deleted since a sync token.
+
+    Without `since` only the current token is returned; a client fetches it
+    before loading the calendar, then passes it back to get the upserts (as
+    compact events) and the ids to delete. Rejected bookings come back as
+    deletes. `reset` asks the client to reload the whole feed: the token is
+    not in the (pruned) change log, there are more than
+    BOOKING_CHANGES_LIMIT changes, or a unit of the property changed.
+    """
+    try:
+        since = request.args.get('since', type=int)
+        if since is None:
+            # The newest change of any property, so that a quiet or fully
+            # pruned property still gets a token inside the log's range
+            return jsonify({'token': db.session.query(func.max(BookingChange.id)).scalar() or 0})
+
+        limit = current_app.config['BOOKING_CHANGES_LIMIT']
+        changes = db.session.query(BookingChange.id, BookingChange.booking_id, BookingChange.operation).filter(
+            BookingChange.property_id == property_id,
+            BookingChange.id > since
+        ).order_by(BookingChange.id).limit(limit + 1).all()
+        oldest, newest = db.session.query(func.min(BookingChange.id), func.max(BookingChange.id)).one()
+
+        token = changes[-1].id if changes else since
+        # A token outside the log's range was pruned, or comes from another database
+        unknown_token = since < (oldest or 1) - 1 or since > (newest or 0)
+        if unknown_token or len(changes) > limit or any(change.operation == 'reset' for change in changes):
+            return jsonify({'token': newest or 0, 'reset': True, 'upserts': [], 'deletes': []})
+
+        # Only the latest change of each booking matters
+        latest_operation = {change.booking_id: change.operation for change in changes}
+        upsert_ids = [booking_id for booking_id, operation in latest_operation.items() if operation == 'upsert']
+        bookings = booking_with_unit_property().filter(
+            Booking.id.in_(upsert_ids),
+            Unit.property_id == property_id,
+            Booking.status != 'rejected'
+        ).all() if upsert_ids else []
+        found = {booking.id for booking in bookings}
+        return jsonify({
+            'token': token,
+            'reset': False,
+            'upserts': [booking_event_json(booking) for booking in bookings],
+            'deletes': [booking_id for booking_id in latest_operation if booking_id not in found]
+        })
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while fetching booking changes: {str(e)}")
+        return jsonify({'error': 'An error occurred while fetching booking changes. Please try again later.'}), 500
+
+@bp.route('/api/bookings/<int:property_id>/events')
+@login_required
+def booking_events_stream(property_id):
+    """Server-Sent Events announcing committed booking changes on the property."""
+    return stream_response(property_channel(property_id))
+
+@bp.route('/api/booking/<int:booking_id>')
+@login_required
+def get_booking_details(booking_id):
+    if current_user.username != 'admin':
+        return jsonify({'error': 'Booking details are only visible to administrators.'}), 403
+    booking = booking_with_unit_property().filter(Booking.id == booking_id).first()
+    if booking is None:
+        return jsonify({'error': 'Booking not found.'}), 404
+    return jsonify(booking_details_json(booking))
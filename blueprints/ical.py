@@ -0,0 +1,174 @@
+import hashlib
+import hmac
+import logging
+from datetime import date, datetime, timedelta, timezone
+from functools import wraps
+from flask import Blueprint, current_app, request, url_for
+from flask_login import current_user
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, Property, Unit, Booking, booking_with_unit_property
+from unit_hierarchy import related_unit_ids_select
+from feed_cache import get_feed_cache
+from ical_cache import event_cache
+from db_routing import read_only
+from blueprints.api import calendar_cache_headers
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('ical', __name__)
+
+PRODID = '-//Mitchell Property Booking System//mxm.dk//'
+ICAL_MIMETYPE = 'text/calendar'
+
+def _signing_key() -> bytes:
+    key = current_app.config.get('ICAL_FEED_TOKEN') or current_app.config['SECRET_KEY']
+    return key if isinstance(key, bytes) else key.encode()
+
+def feed_token(scope: str, object_id: int) -> str:
+    """The token that opens one feed; it cannot be used for any other feed."""
+    message = f"ical:{scope}:{object_id}".encode()
+    return hmac.new(_signing_key(), message, hashlib.sha256).hexdigest()[:32]
+
+@bp.app_template_global()
+def feed_url(scope: str, object_id: int) -> str:
+    """Subscription link for a property or unit feed, with its token."""
+    if scope == 'property':
+        path = url_for('ical.property_feed', property_id=object_id, _external=True)
+    else:
+        path = url_for('ical.unit_feed', unit_id=object_id, _external=True)
+    return f"{path}?token={feed_token(scope, object_id)}"
+
+def feed_access_required(scope: str, id_arg: str):
+    """
+    Let in logged-in users, and calendar clients with the feed's own token
+    (see feed_url) or the shared ICAL_FEED_TOKEN.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            supplied = request.args.get('token', '')
+            shared = current_app.config.get('ICAL_FEED_TOKEN')
+            allowed = current_user.is_authenticated or (supplied and (
+                hmac.compare_digest(supplied, feed_token(scope, kwargs[id_arg]))
+                or (shared and hmac.compare_digest(supplied, shared))
+            ))
+            if not allowed:
+                return current_app.response_class('Calendar feed access denied.\n', status=403, mimetype='text/plain')
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def render_booking_event(booking) -> bytes:
+    """One booking as a serialized VEVENT, the fragment the feeds are built from."""
+    from icalendar import Event  # only loaded once a feed is built
+
+    event = Event()
+    event.add('uid', f'booking-{booking.id}@mitchell-properties.com')
+    # When this rendering was made, which is when its content last changed as far as the cache knows
+    event.add('dtstamp', datetime.now(timezone.utc))
+    event.add('summary', f'{"PENDING - " if booking.status == "pending" else ""}{booking.guest_name} - {booking.unit.name}')
+    event.add('dtstart', datetime.combine(booking.start_date, booking.arrival_time))
+    event.add('dtend', datetime.combine(booking.end_date, booking.departure_time))
+    event.add('location', f"{booking.unit.property.name} - {booking.unit.name}")
+    event.add('status', 'TENTATIVE' if booking.status == 'pending' else 'CONFIRMED')
+    return event.to_ical()
+
+def build_feed(name, bookings) -> bytes:
+    """
+    Wrap the bookings' cached VEVENT fragments in a VCALENDAR. Only bookings
+    that changed since they were last rendered go through icalendar.
+    """
+    from icalendar import vText
+
+    header = '\r\n'.join([
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{vText(name).to_ical().decode()}',
+        ''
+    ]).encode()
+    events = [event_cache.get_or_render(booking, render_booking_event, variant=booking.status) for booking in bookings]
+    return header + b''.join(events) + b'END:VCALENDAR\r\n'
+
+def feed_cutoff():
+    """Feeds leave out bookings that ended more than ICAL_FEED_PAST_DAYS ago."""
+    return date.today() - timedelta(days=current_app.config['ICAL_FEED_PAST_DAYS'])
+
+def feed_response(property_id, version, changed_at, scope, load):
+    """
+    Serve a feed with ETag/Last-Modified validators. The property's change
+    version and the cutoff date identify the content, so an unchanged feed is
+    a 304 after one small query, and a changed one is assembled once per
+    version and then served from the feed cache.
+    """
+    cutoff = feed_cutoff()
+    etag = f"ical-{scope[0]}-{scope[1]}-v{version}-{cutoff.isoformat()}"
+    last_modified = changed_at.replace(tzinfo=timezone.utc) if changed_at else None
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = bool(last_modified and request.if_modified_since
+                            and last_modified.replace(microsecond=0) <= request.if_modified_since)
+    if not_modified:
+        response = current_app.response_class(status=304)
+        return calendar_cache_headers(response, etag, last_modified)
+
+    cache_key = (property_id, version, 'ical', scope[0], scope[1], cutoff)
+    body = get_feed_cache().get(cache_key)
+    if body is None:
+        name, bookings = load(cutoff)
+        body = build_feed(name, bookings)
+        get_feed_cache().set(cache_key, body)
+    response = current_app.response_class(body, mimetype=ICAL_MIMETYPE)
+    return calendar_cache_headers(response, etag, last_modified)
+
+def feed_bookings(cutoff, unit_ids):
+    return booking_with_unit_property().filter(
+        Booking.unit_id.in_(unit_ids),
+        Booking.status != 'rejected',
+        Booking.end_date >= cutoff
+    ).order_by(Booking.start_date, Booking.id).all()
+
+@bp.route('/ical/property/<int:property_id>.ics')
+@feed_access_required('property', 'property_id')
+@read_only
+def property_feed(property_id):
+    try:
+        prop = db.session.query(Property.name, Property.bookings_version, Property.bookings_changed_at).filter(
+            Property.id == property_id
+        ).first()
+        if prop is None:
+            return current_app.response_class('Property not found.\n', status=404, mimetype='text/plain')
+
+        def load(cutoff):
+            unit_ids = db.session.query(Unit.id).filter(Unit.property_id == property_id)
+            return prop.name, feed_bookings(cutoff, unit_ids)
+
+        return feed_response(property_id, prop.bookings_version, prop.bookings_changed_at,
+                             ('property', property_id), load)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while building property calendar feed: {str(e)}")
+        return current_app.response_class('Calendar feed unavailable.\n', status=500, mimetype='text/plain')
+
+@bp.route('/ical/unit/<int:unit_id>.ics')
+@feed_access_required('unit', 'unit_id')
+@read_only
+def unit_feed(unit_id):
+    """Bookings of the unit and of the units it cannot be booked alongside."""
+    try:
+        unit = db.session.query(Unit.name, Unit.property_id, Property.name.label('property_name'),
+                                Property.bookings_version, Property.bookings_changed_at).join(
+            Property, Unit.property_id == Property.id
+        ).filter(Unit.id == unit_id).first()
+        if unit is None:
+            return current_app.response_class('Unit not found.\n', status=404, mimetype='text/plain')
+
+        def load(cutoff):
+            return f"{unit.property_name} - {unit.name}", feed_bookings(cutoff, related_unit_ids_select(unit_id))
+
+        return feed_response(unit.property_id, unit.bookings_version, unit.bookings_changed_at,
+                             ('unit', unit_id), load)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while building unit calendar feed: {str(e)}")
+        return current_app.response_class('Calendar feed unavailable.\n', status=500, mimetype='text/plain')
@@ -0,0 +1,125 @@
+import logging
+from datetime import date, datetime
+from flask import Blueprint, current_app, flash, redirect, render_template, url_for
+from flask_login import login_required, login_user, logout_user
+from sqlalchemy import or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import contains_eager
+from forms import LoginForm, BookingForm
+from models import db, User, Property, Unit, Booking, booking_with_unit_property
+from availability import find_conflicts
+from notifications import notify_admins
+from db_routing import read_only
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('public', __name__)
+
+@bp.route('/')
+@login_required
+@read_only
+def index():
+    logger.info("Fetching properties for index page")
+    properties = Property.query.all()
+    logger.info(f"Number of properties fetched: {len(properties)}")
+    return render_template('properties.html', properties=properties)
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    form = LoginForm()
+    if form.validate_on_submit():
+        admin_user = User.query.filter_by(username='admin').first()
+        regular_user = User.query.filter_by(username='user').first()
+
+        logger.debug(f"Admin passphrase from config: {current_app.config['ADMIN_PASSPHRASE']}")
+        logger.debug(f"User passphrase from config: {current_app.config['USER_PASSPHRASE']}")
+        logger.debug(f"Submitted passphrase: {form.passphrase.data}")
+        logger.debug(f"Admin user found: {admin_user is not None}")
+        logger.debug(f"Regular user found: {regular_user is not None}")
+
+        if admin_user and form.passphrase.data == current_app.config['ADMIN_PASSPHRASE']:
+            logger.debug("Admin login successful")
+            login_user(admin_user)
+            return redirect(url_for('public.index'))
+        elif regular_user and form.passphrase.data == current_app.config['USER_PASSPHRASE']:
+            logger.debug("Regular user login successful")
+            login_user(regular_user)
+            return redirect(url_for('public.index'))
+
+        logger.debug("Invalid passphrase")
+        flash('Invalid passphrase')
+    return render_template('login.html', form=form)
+    
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('public.login'))
+
+@bp.route('/property/<int:property_id>')
+@login_required
+@read_only
+def property_details(property_id):
+    property = Property.query.get_or_404(property_id)
+    upcoming_bookings = booking_with_unit_property().filter(
+        Unit.property_id == property_id,
+        or_(Booking.status == 'approved', Booking.status == 'pending'),
+        Booking.start_date >= date.today()
+    ).order_by(Booking.start_date).all()
+    return render_template('property_details.html', property=property, upcoming_bookings=upcoming_bookings)
+
+@bp.route('/book', methods=['GET', 'POST'])
+@login_required
+def book():
+    form = BookingForm()
+    units = Unit.query.join(Unit.property).options(contains_eager(Unit.property)).all()
+    form.unit_id.choices = [(unit.id, f"{unit.property.name} - {unit.name}") for unit in units]
+    if form.validate_on_submit():
+        try:
+            start = datetime.combine(form.start_date.data, form.arrival_time.data)
+            end = datetime.combine(form.end_date.data, form.departure_time.data)
+            if end <= start:
+                flash('Departure must be after arrival.', 'error')
+                return render_template('booking_form.html', form=form)
+
+            conflicts = find_conflicts(form.unit_id.data, start, end, lock=True)
+            if conflicts:
+                db.session.rollback()
+                logger.info(f"Booking request for unit {form.unit_id.data} conflicts with booking(s) {[b.id for b in conflicts]}")
+                flash('The selected unit is already booked for some of those dates. Please choose different dates or another unit.', 'error')
+                return render_template('booking_form.html', form=form)
+
+            booking = Booking(
+                unit_id=form.unit_id.data,
+                start_date=form.start_date.data,
+                end_date=form.end_date.data,
+                arrival_time=form.arrival_time.data,
+                departure_time=form.departure_time.data,
+                guest_name=form.guest_name.data,
+                guest_email=form.guest_email.data,
+                num_guests=form.num_guests.data,
+                catering_option=form.catering_option.data,
+                special_requests=form.special_requests.data,
+                mobility_impaired=form.mobility_impaired.data == 'Yes',
+                event_manager_contact=form.event_manager_contact.data,
+                offsite_emergency_contact=form.offsite_emergency_contact.data,
+                mitchell_sponsor=form.mitchell_sponsor.data,
+                exclusive_use=form.exclusive_use.data,
+                organization_status=form.organization_status.data,
+                status='pending'
+            )
+            db.session.add(booking)
+            db.session.flush()
+            notify_admins(booking)
+            db.session.commit()
+            flash('Booking request submitted successfully')
+            return redirect(url_for('public.index'))
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Database error while submitting booking: {str(e)}")
+            flash('An error occurred while submitting your booking. Please try again later.', 'error')
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Unexpected error while submitting booking: {str(e)}")
+            flash('An unexpected error occurred. Please try again later.', 'error')
+    return render_template('booking_form.html', form=form)
@@ -0,0 +1,134 @@
+import logging
+from datetime import datetime
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.orm import Session
+from models import db, Property, Unit, Booking, BookingChange
+
+logger = logging.getLogger(__name__)
+
+# Callbacks run with the set of changed property ids after each commit
+_commit_listeners = []
+# Callbacks run with the committed change log rows after each commit
+_change_listeners = []
+
+def on_bookings_committed(callback):
+    """Register a callback for committed booking or unit changes, e.g. cache invalidation."""
+    _commit_listeners.append(callback)
+    return callback
+
+def on_booking_changes_committed(callback):
+    """
+    Register a callback for the committed change log rows (property_id,
+    booking_id and operation), e.g. to push them to open calendars.
+    """
+    _change_listeners.append(callback)
+    return callback
+
+def _pending_changes(session):
+    """
+    Properties whose calendar is affected by the pending flush, and the change
+    log rows to record for them: an upsert or delete per booking, and a reset
+    for a property whose units changed.
+    """
+    booking_units = []  # (booking id, unit id, operation)
+    property_ids = set()
+    reset_property_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Booking):
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            if obj in session.deleted:
+                booking_units.append((obj.id, obj.unit_id, 'delete'))
+                continue
+            if obj in session.dirty:
+                # A booking moved off a unit disappears from that unit's property
+                for old_unit_id in inspect(obj).attrs.unit_id.history.deleted:
+                    booking_units.append((obj.id, old_unit_id, 'delete'))
+            booking_units.append((obj.id, obj.unit_id, 'upsert'))
+        elif isinstance(obj, Unit):
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            reset_property_ids.add(obj.property_id)
+        elif isinstance(obj, Property) and obj in session.deleted:
+            property_ids.add(obj.id)
+
+    unit_ids = {unit_id for _, unit_id, _ in booking_units if unit_id is not None}
+    unit_properties = {}
+    if unit_ids:
+        with session.no_autoflush:
+            unit_properties = dict(session.execute(
+                select(Unit.id, Unit.property_id).where(Unit.id.in_(unit_ids))
+            ).all())
+
+    changes = []
+    for booking_id, unit_id, operation in booking_units:
+        property_id = unit_properties.get(unit_id)
+        if property_id is not None:
+            changes.append({'property_id': property_id, 'booking_id': booking_id, 'operation': operation})
+    reset_property_ids.discard(None)
+    changes.extend({'property_id': property_id, 'booking_id': None, 'operation': 'reset'}
+                   for property_id in reset_property_ids)
+    property_ids.update(change['property_id'] for change in changes)
+    property_ids.discard(None)
+    return {int(property_id) for property_id in property_ids}, changes
+
+@event.listens_for(Session, 'after_flush')
+def bump_property_versions(session, flush_context):
+    """
+    Bump Property.bookings_version for every property whose bookings or units
+    were inserted, modified or deleted in this flush, and append the changes
+    to the booking change log. The calendar feed uses the version as its
+    ETag, so clients revalidate without the server touching the booking
+    table; the change log lets them fetch just what changed.
+
+    The change rows are written after the version update, which holds the
+    property rows' locks until commit, so one property's change ids commit
+    in order and a client's token never skips an uncommitted change.
+    """
+    property_ids, changes = _pending_changes(session)
+    if not property_ids:
+        return
+    session.info.setdefault('changed_property_ids', set()).update(property_ids)
+    now = datetime.utcnow()
+    session.connection().execute(
+        update(Property.__table__)
+        .where(Property.__table__.c.id.in_(property_ids))
+        .values(bookings_version=Property.__table__.c.bookings_version + 1,
+                bookings_changed_at=now)
+    )
+    if changes:
+        session.info.setdefault('booking_changes', []).extend(changes)
+        session.connection().execute(
+            insert(BookingChange.__table__),
+            [dict(change, changed_at=now) for change in changes]
+        )
+
+@event.listens_for(Session, 'after_commit')
+def notify_committed_changes(session):
+    property_ids = session.info.pop('changed_property_ids', None)
+    changes = session.info.pop('booking_changes', None)
+    if property_ids:
+        _run_listeners(_commit_listeners, property_ids)
+    if changes:
+        _run_listeners(_change_listeners, changes)
+
+def _run_listeners(listeners, argument):
+    for callback in listeners:
+        try:
+            callback(argument)
+        except Exception as e:
+            logger.error(f"Error in booking change listener {callback.__name__}: {str(e)}", exc_info=True)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_uncommitted_changes(session):
+    session.info.pop('changed_property_ids', None)
+    session.info.pop('booking_changes', None)
+
+def prune_booking_changes(before: datetime) -> int:
+    """
+    Delete change log rows older than `before`. Clients holding a token from
+    before the cut are told to reload their calendar instead.
+    """
+    deleted = BookingChange.query.filter(BookingChange.changed_at < before).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
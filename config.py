@@ -1,11 +1,40 @@
 import os
 
+def engine_options(uri):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* settings. Hosted Postgres
+    drops idle connections, so they are recycled before that happens and
+    pinged on checkout; SQLite keeps SQLAlchemy's defaults.
+    """
+    options = {'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')}
+    if uri and not uri.startswith('sqlite:///:memory:') and uri != 'sqlite://':
+        options.update(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+            # Seconds a request waits for a free connection before failing
+            pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', 300)),
+        )
+    # Milliseconds any one statement may run on Postgres; 0 disables the limit
+    statement_timeout = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    if uri and uri.startswith('postgresql') and statement_timeout:
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or os.urandom(32)
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     if SQLALCHEMY_DATABASE_URI and SQLALCHEMY_DATABASE_URI.startswith("postgres://"):
         SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace("postgres://", "postgresql://", 1)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Optional read replica for the read-only routes. A user who just wrote reads
+    # from the primary for DB_PRIMARY_PIN_SECONDS so they see their own changes.
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    if DATABASE_REPLICA_URL and DATABASE_REPLICA_URL.startswith("postgres://"):
+        DATABASE_REPLICA_URL = DATABASE_REPLICA_URL.replace("postgres://", "postgresql://", 1)
+    SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    DB_PRIMARY_PIN_SECONDS = int(os.environ.get('DB_PRIMARY_PIN_SECONDS', 10))
     
     # Email configuration
     MAIL_SERVER = 'smtp-mail.outlook.com'
@@ -15,7 +44,73 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_USERNAME')
+    MAIL_TIMEOUT = int(os.environ.get('MAIL_TIMEOUT', 30))
+    # Authenticated SMTP sessions are kept open for reuse for this many seconds
+    MAIL_POOL_IDLE_TIMEOUT = int(os.environ.get('MAIL_POOL_IDLE_TIMEOUT', 60))
+    MAIL_POOL_MAX_SIZE = int(os.environ.get('MAIL_POOL_MAX_SIZE', 2))
 
     # User and Admin passphrases
     USER_PASSPHRASE = os.environ.get('USER_PASSPHRASE')
     ADMIN_PASSPHRASE = os.environ.get('ADMIN_PASSPHRASE')
+    # Seconds a logged-in user stays cached in each process before it is reloaded
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 300))
+
+    # Root log level (DEBUG, INFO, WARNING, ...)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG')
+    # Per-request wall/SQL/template/email timings as log lines and Server-Timing headers
+    REQUEST_TIMING_ENABLED = os.environ.get('REQUEST_TIMING_ENABLED', '').lower() in ('1', 'true', 'yes')
+
+    # Bearer token for /metrics; when unset only loopback clients may scrape it
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Server-side cache of serialized calendar feeds. Set FEED_CACHE_REDIS_URL
+    # (e.g. redis://localhost:6379/0) to share it between workers.
+    FEED_CACHE_SIZE = int(os.environ.get('FEED_CACHE_SIZE', 256))
+    FEED_CACHE_REDIS_URL = os.environ.get('FEED_CACHE_REDIS_URL')
+    FEED_CACHE_TTL = int(os.environ.get('FEED_CACHE_TTL', 3600))
+
+    # Rendered iCalendar invites kept in each process, one per booking version
+    INVITE_CACHE_SIZE = int(os.environ.get('INVITE_CACHE_SIZE', 1024))
+    # Subscription feeds at /ical/property/<id>.ics and /ical/unit/<id>.ics.
+    # Calendar clients cannot log in, so the subscribe links carry a per-feed
+    # token signed with ICAL_FEED_TOKEN, or SECRET_KEY when that is unset.
+    # Set one of them in production: changing it (or a random SECRET_KEY on
+    # restart) breaks existing subscriptions. ICAL_FEED_TOKEN itself is also
+    # accepted as a token for every feed.
+    ICAL_FEED_TOKEN = os.environ.get('ICAL_FEED_TOKEN')
+    # Days of past bookings a feed keeps, and rendered events cached per process
+    ICAL_FEED_PAST_DAYS = int(os.environ.get('ICAL_FEED_PAST_DAYS', 90))
+    ICAL_EVENT_CACHE_SIZE = int(os.environ.get('ICAL_EVENT_CACHE_SIZE', 10000))
+
+    # Booking change log behind /api/bookings/<id>/changes: days kept by
+    # `flask prune-booking-changes`, and the most changes one response returns
+    # before the client is told to reload instead
+    BOOKING_CHANGES_RETENTION_DAYS = int(os.environ.get('BOOKING_CHANGES_RETENTION_DAYS', 30))
+    BOOKING_CHANGES_LIMIT = int(os.environ.get('BOOKING_CHANGES_LIMIT', 500))
+
+    # Server-Sent Events for open calendars and the admin queue. "memory"
+    # reaches the streams of one process; "redis" (LIVE_UPDATES_REDIS_URL) and
+    # "postgres" (LISTEN/NOTIFY on the database) reach every worker. Postgres
+    # databases use "postgres" by default; gunicorn.conf.py runs a single
+    # worker with "memory".
+    LIVE_UPDATES_BACKEND = os.environ.get(
+        'LIVE_UPDATES_BACKEND',
+        'postgres' if SQLALCHEMY_DATABASE_URI and SQLALCHEMY_DATABASE_URI.startswith('postgresql') else 'memory'
+    )
+    LIVE_UPDATES_REDIS_URL = os.environ.get('LIVE_UPDATES_REDIS_URL')
+    # Each open stream holds one of the worker's GUNICORN_THREADS, so cap them
+    # per process and leave threads for ordinary requests; clients over the
+    # cap fall back to polling. Streams end after LIVE_UPDATES_MAX_SECONDS and
+    # the browser reconnects.
+    LIVE_UPDATES_MAX_STREAMS = int(os.environ.get('LIVE_UPDATES_MAX_STREAMS', 2))
+    LIVE_UPDATES_HEARTBEAT = int(os.environ.get('LIVE_UPDATES_HEARTBEAT', 15))
+    LIVE_UPDATES_MAX_SECONDS = int(os.environ.get('LIVE_UPDATES_MAX_SECONDS', 300))
+
+    # Rows per page in the admin dashboard's booking tables
+    ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', 25))
+
+    # Email outbox worker
+    OUTBOX_POLL_INTERVAL = int(os.environ.get('OUTBOX_POLL_INTERVAL', 5))
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 20))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+    OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get('OUTBOX_RETRY_BASE_SECONDS', 30))
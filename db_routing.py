@@ -0,0 +1,53 @@
+"""
+Read-replica routing. When a replica is configured (SQLALCHEMY_BINDS['replica']),
+views decorated with @read_only run their queries against it. A user whose
+request wrote to the primary is pinned to the primary for
+DB_PRIMARY_PIN_SECONDS, so they read their own writes while the replica catches up.
+"""
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, session as browser_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND = 'replica'
+
+class RoutingSession(Session):
+    """Sends reads to the replica inside @read_only views; everything else uses the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_from_replica():
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self):
+        return (has_request_context() and g.get('read_replica', False)
+                and not self._flushing and not (self.new or self.dirty or self.deleted))
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _remember_write(session, flush_context):
+    if has_request_context():
+        g.wrote_to_primary = True
+
+def replica_configured(app=None):
+    return REPLICA_BIND in (app or current_app).config.get('SQLALCHEMY_BINDS', {})
+
+def pinned_to_primary():
+    return browser_session.get('primary_pin_until', 0) > time.time()
+
+def read_only(view):
+    """Serve the view from the replica, unless this user wrote recently."""
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        g.read_replica = replica_configured() and not pinned_to_primary()
+        return view(*args, **kwargs)
+    return decorated_function
+
+def _pin_writers(response):
+    if g.get('wrote_to_primary'):
+        browser_session['primary_pin_until'] = time.time() + current_app.config['DB_PRIMARY_PIN_SECONDS']
+    return response
+
+def init_replica_routing(app):
+    if replica_configured(app):
+        app.after_request(_pin_writers)
@@ -1,96 +1,222 @@
-import os
-from flask_mail import Message
+from __future__ import annotations
+
 from flask import current_app
-from icalendar import Calendar, Event
 from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
 import time
-from typing import List, Optional
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, List, Optional
+from instrumentation import timed_email
+from metrics import track_smtp_send
+from ical_cache import invite_cache
+
+if TYPE_CHECKING:
+    # smtplib and email.mime are imported where mail is sent, not at startup
+    import smtplib
+    from email.mime.multipart import MIMEMultipart
 
-def send_email_with_retry(subject: str, body: str, recipients: List[str], 
-                         ical_attachment: Optional[bytes] = None, max_retries: int = 3) -> bool:
+class SMTPConnectionPool:
     """
-    Send an email with retry logic and better error handling
+    Keeps authenticated SMTP sessions open between emails, so consecutive sends
+    skip the connect, STARTTLS and login round trips
     """
-    retry_count = 0
-    while retry_count < max_retries:
+
+    def __init__(self, host: str, port: int, username: Optional[str], password: Optional[str],
+                 use_tls: bool = True, idle_timeout: float = 60, max_size: int = 2, timeout: float = 30,
+                 logger=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.idle_timeout = idle_timeout
+        self.max_size = max_size
+        self.timeout = timeout
+        self.logger = logger
+        self._idle = []  # (connection, released_at) pairs, most recently used last
+        self._lock = threading.Lock()
+
+    def _log(self, message: str) -> None:
+        if self.logger:
+            self.logger.info(message)
+
+    def _connect(self) -> smtplib.SMTP:
+        import smtplib
+
+        self._log(f"Establishing SMTP connection to {self.host}:{self.port}...")
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                self._log("Starting TLS...")
+                server.starttls()
+            if self.username:
+                self._log("Attempting SMTP login...")
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        import smtplib
+
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _acquire(self) -> smtplib.SMTP:
+        expired = []
+        server = None
+        with self._lock:
+            now = time.monotonic()
+            while self._idle:
+                candidate, released_at = self._idle.pop()
+                if now - released_at <= self.idle_timeout:
+                    server = candidate
+                    break
+                expired.append(candidate)
+        for candidate in expired:
+            self._close(candidate)
+        return server or self._connect()
+
+    def _release(self, server: smtplib.SMTP) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((server, time.monotonic()))
+                return
+        self._close(server)
+
+    @contextmanager
+    def session(self):
+        """
+        Borrow one connection for a series of sends
+        """
+        session = _PooledSession(self, self._acquire())
+        try:
+            yield session
+        except Exception:
+            # The connection may be mid-transaction; don't hand it out again.
+            self._close(session.server)
+            raise
+        self._release(session.server)
+
+    def send_message(self, msg: MIMEMultipart) -> None:
+        with self.session() as session:
+            session.send_message(msg)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close(server)
+
+class _PooledSession:
+    def __init__(self, pool: SMTPConnectionPool, server: smtplib.SMTP):
+        self.pool = pool
+        self.server = server
+
+    def send_message(self, msg: MIMEMultipart) -> None:
+        import smtplib
+
         try:
-            # Log attempt
-            current_app.logger.info(f"Email sending attempt {retry_count + 1} of {max_retries}")
-            current_app.logger.info(f"Using SMTP server: {current_app.config['MAIL_SERVER']}:{current_app.config['MAIL_PORT']}")
-            current_app.logger.info(f"Sending from: {current_app.config['MAIL_USERNAME']}")
-            current_app.logger.info(f"Recipients: {recipients}")
-
-            # Create MIME message
-            msg = MIMEMultipart()
-            msg['Subject'] = subject
-            msg['From'] = current_app.config['MAIL_USERNAME']
-            msg['To'] = ', '.join(recipients)
-
-            # Add body
-            msg.attach(MIMEText(body, 'plain'))
-
-            # Add calendar attachment if provided
-            if ical_attachment:
-                cal_attachment = MIMEApplication(
-                    ical_attachment,
-                    _subtype='ics'
-                )
-                cal_attachment.add_header(
-                    'Content-Disposition',
-                    'attachment; filename="event.ics"'
-                )
-                msg.attach(cal_attachment)
-                current_app.logger.info("Calendar attachment added to email")
-
-            # Setup SMTP connection with TLS for Outlook
-            current_app.logger.info("Establishing SMTP connection...")
-            with smtplib.SMTP(current_app.config['MAIL_SERVER'], 
-                            current_app.config['MAIL_PORT']) as server:
-                current_app.logger.info("Starting TLS...")
-                server.starttls()  # Enable TLS
-                
-                current_app.logger.info("Attempting SMTP login...")
-                server.login(
-                    current_app.config['MAIL_USERNAME'],
-                    current_app.config['MAIL_PASSWORD']
-                )
-                
-                current_app.logger.info("Sending message...")
-                server.send_message(msg)
-
-            current_app.logger.info(f"Email sent successfully to {recipients}")
-            return True
-
-        except smtplib.SMTPAuthenticationError as e:
-            current_app.logger.error(f"SMTP Authentication failed: {str(e)}")
-            current_app.logger.error(f"Username used: {current_app.config['MAIL_USERNAME']}")
-            current_app.logger.error("Please check your email credentials")
-            return False  # Don't retry for auth errors
-
-        except (smtplib.SMTPException, ConnectionError) as e:
-            retry_count += 1
-            if retry_count == max_retries:
-                current_app.logger.error(f"Failed to send email after {max_retries} attempts: {str(e)}")
-                return False
-            
-            wait_time = 2 ** retry_count
-            current_app.logger.warning(
-                f"Email sending attempt {retry_count} failed. Retrying in {wait_time} seconds... Error: {str(e)}"
+            self.server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Idle sessions get dropped by the server; reconnect once and resend.
+            self.pool._log("SMTP connection was closed by the server, reconnecting...")
+            self.server.close()
+            self.server = self.pool._connect()
+            self.server.send_message(msg)
+
+_pool_lock = threading.Lock()
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """
+    Return the SMTP connection pool for the current app, creating it on first use
+    """
+    with _pool_lock:
+        pool = current_app.extensions.get('smtp_pool')
+        if pool is None:
+            pool = SMTPConnectionPool(
+                current_app.config['MAIL_SERVER'],
+                current_app.config['MAIL_PORT'],
+                current_app.config['MAIL_USERNAME'],
+                current_app.config['MAIL_PASSWORD'],
+                use_tls=current_app.config.get('MAIL_USE_TLS', True),
+                idle_timeout=current_app.config['MAIL_POOL_IDLE_TIMEOUT'],
+                max_size=current_app.config['MAIL_POOL_MAX_SIZE'],
+                timeout=current_app.config['MAIL_TIMEOUT'],
+                logger=current_app.logger
             )
-            time.sleep(wait_time)
+            current_app.extensions['smtp_pool'] = pool
+        return pool
+
+def build_message(subject: str, body: str, recipients: List[str],
+                  ical_attachment: Optional[bytes] = None) -> MIMEMultipart:
+    """
+    Build the MIME message for a notification email
+    """
+    from email.mime.application import MIMEApplication
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    msg = MIMEMultipart()
+    msg['Subject'] = subject
+    msg['From'] = current_app.config['MAIL_USERNAME']
+    msg['To'] = ', '.join(recipients)
+
+    # Add body
+    msg.attach(MIMEText(body, 'plain'))
 
-        except Exception as e:
-            current_app.logger.error(f"Unexpected error sending email: {str(e)}", exc_info=True)
-            return False
+    # Add calendar attachment if provided
+    if ical_attachment:
+        cal_attachment = MIMEApplication(
+            ical_attachment,
+            _subtype='ics'
+        )
+        cal_attachment.add_header(
+            'Content-Disposition',
+            'attachment; filename="event.ics"'
+        )
+        msg.attach(cal_attachment)
+        current_app.logger.info("Calendar attachment added to email")
+
+    return msg
+
+def send_email(subject: str, body: str, recipients: List[str],
+               ical_attachment: Optional[bytes] = None, smtp=None) -> None:
+    """
+    Send a single email, raising the underlying SMTP error on failure.
+    Pass a session from get_smtp_pool().session() to send a series of emails
+    over one connection.
+    """
+    current_app.logger.info(f"Using SMTP server: {current_app.config['MAIL_SERVER']}:{current_app.config['MAIL_PORT']}")
+    current_app.logger.info(f"Sending from: {current_app.config['MAIL_USERNAME']}")
+    current_app.logger.info(f"Recipients: {recipients}")
+
+    msg = build_message(subject, body, recipients, ical_attachment)
+
+    # Reuses an authenticated session from the pool when one is open
+    current_app.logger.info("Sending message...")
+    with timed_email(), track_smtp_send():
+        (smtp or get_smtp_pool()).send_message(msg)
+
+    current_app.logger.info(f"Email sent successfully to {recipients}")
 
 def create_ical_invite(booking) -> bytes:
+    """
+    The iCalendar invitation for a booking, rendered once per version of its
+    content and then served from the invite cache
+    """
+    return invite_cache.get_or_render(booking, render_ical_invite)
+
+def render_ical_invite(booking) -> bytes:
     """
     Create an iCalendar invitation for a booking
     """
+    from icalendar import Calendar, Event  # only loaded once an invite is built
+
     try:
         cal = Calendar()
         cal.add('prodid', '-//Mitchell Property Booking System//mxm.dk//')
@@ -0,0 +1,7 @@
+from flask_login import LoginManager
+from flask_migrate import Migrate
+
+# Bound to an app by create_app(); `db` lives in models.py with the models
+migrate = Migrate()
+login_manager = LoginManager()
+login_manager.login_view = 'public.login'
@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from flask import current_app
+from metrics import record_cache_lookup
+
+class LRUFeedCache:
+    """
+    In-process LRU cache of serialized calendar feed responses, bounded to
+    `max_entries`. Keys start with the property id so a write can drop every
+    cached window of that property.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        record_cache_lookup('feed', value is not None)
+        return value
+
+    def set(self, key: Tuple, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_property(self, property_id: int) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == property_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'backend': 'memory',
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0
+            }
+
+class RedisFeedCache:
+    """
+    Calendar feed cache shared by all workers through a Redis-compatible
+    server. Entries expire after `ttl` seconds; hit and miss counters are
+    per process.
+    """
+
+    def __init__(self, url: str, ttl: int = 3600, prefix: str = 'feed'):
+        import redis  # optional dependency, only needed with FEED_CACHE_REDIS_URL
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _key(self, key: Tuple) -> str:
+        return ':'.join([self.prefix] + [str(part) for part in key])
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        record_cache_lookup('feed', hit)
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        value = self.client.get(self._key(key))
+        self._count(value is not None)
+        return value
+
+    def set(self, key: Tuple, value: bytes) -> None:
+        self.client.set(self._key(key), value, ex=self.ttl)
+
+    def invalidate_property(self, property_id: int) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:{property_id}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'backend': 'redis',
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0
+            }
+
+def create_feed_cache(config):
+    """Build the feed cache described by the app config."""
+    if config.get('FEED_CACHE_REDIS_URL'):
+        return RedisFeedCache(config['FEED_CACHE_REDIS_URL'], ttl=config['FEED_CACHE_TTL'])
+    return LRUFeedCache(max_entries=config['FEED_CACHE_SIZE'])
+
+def get_feed_cache():
+    """The current app's feed cache, created by create_app()."""
+    return current_app.extensions['feed_cache']
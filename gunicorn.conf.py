@@ -0,0 +1,75 @@
+"""
+Gunicorn settings for the booking app. Every value can be overridden from the
+environment; defaults are sized from the machine's cores.
+
+Requests spend most of their time waiting on the database, so each worker
+process runs several threads (gthread) rather than one request at a time.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+from config import Config
+
+cores = multiprocessing.cpu_count()
+
+# Workers share their Prometheus samples through this directory (see
+# metrics.py). It must be set before the app is preloaded. A directory passed
+# in by the caller is left as it is, because other processes such as the
+# outbox worker may already be writing to it. The default one is emptied on
+# every start.
+if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = os.path.join(tempfile.gettempdir(), 'booking-metrics')
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+wsgi_app = 'wsgi:app'
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', min(2 * cores + 1, 9)))
+# The in-memory live update broker only reaches streams in its own process,
+# so with it every client must be served by the same worker
+if Config.LIVE_UPDATES_BACKEND == 'memory':
+    workers = 1
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Load the app once in the master so workers fork with it already imported
+preload_app = True
+
+# Seconds a worker may spend on one request, and to finish in-flight requests on restart
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+# Seconds to hold idle client connections open (behind a proxy that reuses them)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers now and then so slow leaks cannot accumulate
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
+
+def on_starting(server):
+    """Create the schema and sample data once, before any worker starts."""
+    from wsgi import app, init_db
+    init_db(app)
+
+def when_ready(server):
+    # The master serves no requests; drop the pool gauges it set while preloading
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(os.getpid())
+
+def post_fork(server, worker):
+    # Connections opened by the master must not be shared with the workers
+    from wsgi import app
+    from models import db
+    from metrics import record_pool_capacity
+    with app.app_context():
+        # Every engine, including the read replica's when one is configured
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+        record_pool_capacity(db.engine)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
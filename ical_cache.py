@@ -0,0 +1,96 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+from sqlalchemy import event, inspect
+from models import Booking
+from metrics import record_cache_lookup
+
+def booking_content_version(booking) -> str:
+    """
+    Fingerprint of everything a booking's calendar entry shows, including the
+    unit and property names, so any change to those yields a new version.
+    """
+    fields = (
+        booking.guest_name, booking.guest_email, booking.num_guests, booking.special_requests,
+        booking.start_date, booking.arrival_time, booking.end_date, booking.departure_time,
+        booking.unit.name, booking.unit.property.name
+    )
+    return hashlib.sha1(repr(fields).encode()).hexdigest()[:16]
+
+class ICalCache:
+    """
+    Process-local LRU cache of serialized iCalendar bytes, keyed by
+    (booking id, content version, variant). A stale version is never looked
+    up again; entries are also dropped explicitly when their booking changes,
+    so the cache only holds what current bookings render to.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1024):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[int, str, str]) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup(self.name, value is not None)
+        return value
+
+    def set(self, key: Tuple[int, str, str], value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_render(self, booking, render: Callable[[object], bytes], variant: str = '') -> bytes:
+        """
+        The cached bytes for the booking as it is now, rendering them on a miss.
+        `variant` covers anything else the rendering depends on, e.g. the status.
+        """
+        key = (booking.id, booking_content_version(booking), variant)
+        value = self.get(key)
+        if value is None:
+            value = render(booking)
+            if value:
+                self.set(key, value)
+        return value
+
+    def invalidate(self, booking_id: Optional[int] = None) -> None:
+        """Drop every version of one booking, or everything when no id is given."""
+        with self._lock:
+            if booking_id is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == booking_id]:
+                    del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries}
+
+# Email invitations, shared by the admin and guest notifications of a booking
+invite_cache = ICalCache('invite')
+# VEVENT fragments the subscription feeds are assembled from
+event_cache = ICalCache('ical_event', max_entries=10000)
+
+# Attributes that never appear in a calendar entry
+_UNRENDERED_ATTRIBUTES = {'status'}
+
+@event.listens_for(Booking, 'after_update')
+def _invalidate_changed_booking(mapper, connection, target):
+    changed = {attr.key for attr in inspect(target).attrs if attr.history.has_changes()}
+    if changed - _UNRENDERED_ATTRIBUTES:
+        invite_cache.invalidate(target.id)
+    # Feed events show the status too
+    if changed:
+        event_cache.invalidate(target.id)
+
+@event.listens_for(Booking, 'after_delete')
+def _invalidate_deleted_booking(mapper, connection, target):
+    invite_cache.invalidate(target.id)
+    event_cache.invalidate(target.id)
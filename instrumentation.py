@@ -0,0 +1,111 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('request_timing')
+
+class RequestTiming:
+    """Where one request's time went, in seconds."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.email_count = 0
+        self.email_time = 0.0
+        self._template_started = []
+
+    def as_dict(self):
+        return {
+            'wall_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'email_count': self.email_count,
+            'email_ms': round(self.email_time * 1000, 2),
+        }
+
+def current_timing():
+    """The RequestTiming of the request being handled, or None."""
+    if has_request_context():
+        return g.get('request_timing')
+    return None
+
+@contextmanager
+def timed_email():
+    """Attribute the enclosed block to the request's email time."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing = current_timing()
+        if timing:
+            timing.email_count += 1
+            timing.email_time += time.perf_counter() - started
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_timing():
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = current_timing()
+    started = conn.info.get('query_started')
+    if timing and started:
+        timing.sql_count += 1
+        timing.sql_time += time.perf_counter() - started.pop()
+
+def _before_render_template(sender, template, context, **extra):
+    timing = current_timing()
+    if timing:
+        timing._template_started.append(time.perf_counter())
+
+def _template_rendered(sender, template, context, **extra):
+    timing = current_timing()
+    if timing and timing._template_started:
+        timing.template_time += time.perf_counter() - timing._template_started.pop()
+
+def _start_timing():
+    g.request_timing = RequestTiming()
+
+def _finish_timing(response):
+    timing = current_timing()
+    if timing is None:
+        return response
+    # Streamed bodies (e.g. the CSV export) are produced after this point,
+    # so their timings cover building the response, not sending it.
+    stats = timing.as_dict()
+    logger.info(json.dumps({
+        'route': request.endpoint,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        **stats
+    }))
+    response.headers['Server-Timing'] = ', '.join([
+        f"app;dur={stats['wall_ms']}",
+        f"sql;dur={stats['sql_ms']};desc=\"{stats['sql_count']} queries\"",
+        f"tmpl;dur={stats['template_ms']}",
+        f"email;dur={stats['email_ms']}",
+    ])
+    response.headers['X-Timing'] = (
+        f"wall={stats['wall_ms']}ms sql={stats['sql_count']}/{stats['sql_ms']}ms "
+        f"template={stats['template_ms']}ms email={stats['email_count']}/{stats['email_ms']}ms"
+    )
+    return response
+
+def init_instrumentation(app):
+    """Record per-request wall, SQL, template and email time when REQUEST_TIMING_ENABLED is set."""
+    if not app.config.get('REQUEST_TIMING_ENABLED'):
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+    app.before_request(_start_timing)
+    app.after_request(_finish_timing)
@@ -0,0 +1,298 @@
+"""
+Server-Sent Events for booking changes.
+
+Committed changes are published on a channel per property ("property:<id>")
+and on the admin queue channel ("admin"). Each process fans messages out to
+its open event streams through in-process queues. With one process that is
+all that is needed; with several gunicorn workers, LIVE_UPDATES_BACKEND
+relays messages between them through Redis pub/sub or Postgres
+LISTEN/NOTIFY, and every worker delivers them to its own streams.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Optional, Set
+from flask import current_app, jsonify
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+ADMIN_CHANNEL = 'admin'
+# How long a browser waits before reconnecting a dropped stream
+RECONNECT_MS = 5000
+# Most bookings listed in one admin queue message
+MAX_ADMIN_BOOKINGS = 100
+
+def property_channel(property_id: int) -> str:
+    return f"property:{property_id}"
+
+class StreamLimitReached(Exception):
+    """Raised when a process already holds LIVE_UPDATES_MAX_STREAMS streams."""
+
+class LocalBroker:
+    """
+    In-process pub/sub. Every stream gets a bounded queue; a stream that
+    falls behind loses messages rather than holding memory, which is safe
+    because clients treat a message only as a cue to fetch the changes.
+    """
+
+    backend = 'memory'
+
+    def __init__(self, max_streams: int = 100, queue_size: int = 100):
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[queue.Queue]] = {}
+        self._streams = 0
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, data: dict) -> None:
+        self.deliver(channel, data)
+
+    def deliver(self, channel: str, data: dict) -> None:
+        """Hand a message to this process's subscribers of the channel."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(data)
+            except queue.Full:
+                pass
+
+    @contextmanager
+    def subscribe(self, channel: str):
+        with self._lock:
+            if self._streams >= self.max_streams:
+                raise StreamLimitReached(f"{self._streams} event streams already open")
+            self._streams += 1
+            subscriber = queue.Queue(maxsize=self.queue_size)
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+        self.start()
+        try:
+            yield subscriber
+        finally:
+            with self._lock:
+                self._streams -= 1
+                self._subscribers[channel].discard(subscriber)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+    def start(self) -> None:
+        """Start relaying messages from other processes; nothing to do in-process."""
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'backend': self.backend, 'streams': self._streams, 'max_streams': self.max_streams,
+                    'channels': len(self._subscribers)}
+
+class RelayBroker(LocalBroker, ABC):
+    """
+    Publishes through an external server and delivers what a background
+    thread receives from it. The thread starts on the first subscription, so
+    it runs in the gunicorn worker rather than the preloading master.
+    """
+
+    def __init__(self, topic: str = 'booking_events', **kwargs):
+        super().__init__(**kwargs)
+        self.topic = topic
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, channel: str, data: dict) -> None:
+        try:
+            self.send(json.dumps({'channel': channel, 'data': data}))
+        except Exception as e:
+            # Streams in other workers miss this message; deliver it here at least
+            logger.error(f"Could not publish live update on {channel}: {str(e)}")
+            self.deliver(channel, data)
+
+    def receive(self, payload) -> None:
+        try:
+            message = json.loads(payload)
+            self.deliver(message['channel'], message['data'])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed live update: {str(e)}")
+
+    def start(self) -> None:
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen_forever, name=f"{self.backend}-listener",
+                                                  daemon=True)
+                self._listener.start()
+
+    def _listen_forever(self) -> None:
+        while True:
+            try:
+                self.listen()
+            except Exception as e:
+                logger.error(f"Live update listener ({self.backend}) failed, reconnecting: {str(e)}")
+            threading.Event().wait(1)
+
+    @abstractmethod
+    def send(self, payload: str) -> None:
+        """Publish a serialized message to every process."""
+
+    @abstractmethod
+    def listen(self) -> None:
+        """Receive messages from the server until the connection drops."""
+
+class RedisBroker(RelayBroker):
+    """Relays messages between workers through a Redis pub/sub channel."""
+
+    backend = 'redis'
+
+    def __init__(self, url: str, **kwargs):
+        import redis  # optional dependency, only needed with LIVE_UPDATES_BACKEND=redis
+
+        super().__init__(**kwargs)
+        self.client = redis.Redis.from_url(url)
+
+    def send(self, payload: str) -> None:
+        self.client.publish(self.topic, payload)
+
+    def listen(self) -> None:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.topic)
+        try:
+            for message in pubsub.listen():
+                self.receive(message['data'])
+        finally:
+            pubsub.close()
+
+class PostgresBroker(RelayBroker):
+    """
+    Relays messages between workers with Postgres NOTIFY, sent over a pooled
+    connection of the app's engine. The listener holds one connection of its
+    own outside the pool.
+    """
+
+    backend = 'postgres'
+
+    def __init__(self, url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.url = make_url(url).set(drivername='postgresql').render_as_string(hide_password=False)
+
+    def _connect(self):
+        import psycopg2
+
+        connection = psycopg2.connect(self.url)
+        connection.autocommit = True
+        return connection
+
+    def send(self, payload: str) -> None:
+        from models import db
+
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT pg_notify(:topic, :payload)'), {'topic': self.topic, 'payload': payload})
+            connection.commit()
+
+    def listen(self) -> None:
+        import select
+
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'LISTEN {self.topic}')
+            while True:
+                # Wake up now and then so a dropped connection is noticed
+                if select.select([connection], [], [], 30) == ([], [], []):
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    self.receive(connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+def create_broker(config):
+    """Build the live update broker described by the app config."""
+    options = {'max_streams': config['LIVE_UPDATES_MAX_STREAMS']}
+    backend = config['LIVE_UPDATES_BACKEND']
+    if backend == 'redis':
+        return RedisBroker(config['LIVE_UPDATES_REDIS_URL'], **options)
+    if backend == 'postgres':
+        return PostgresBroker(config['SQLALCHEMY_DATABASE_URI'], **options)
+    return LocalBroker(**options)
+
+def get_broker():
+    """The current app's live update broker, created by create_app()."""
+    return current_app.extensions['live_updates']
+
+def publish_booking_changes(changes) -> None:
+    """
+    Announce committed booking changes: one message per affected property,
+    and one for the admin queue listing the bookings that changed.
+    """
+    broker = get_broker()
+    property_ids = sorted({change['property_id'] for change in changes})
+    for property_id in property_ids:
+        broker.publish(property_channel(property_id), {'property_id': property_id})
+    bookings = [{'id': change['booking_id'], 'operation': change['operation']}
+                for change in changes if change['booking_id'] is not None]
+    # Large batches (and unit changes) just ask the admin page to reload its
+    # tables, which also keeps the message within NOTIFY's payload limit
+    reset = len(bookings) > MAX_ADMIN_BOOKINGS or any(change['operation'] == 'reset' for change in changes)
+    broker.publish(ADMIN_CHANNEL, {
+        'property_ids': property_ids,
+        'bookings': [] if reset else bookings,
+        'reset': reset
+    })
+
+def format_event(data: Optional[dict] = None, event: str = 'change') -> str:
+    if data is None:
+        # A comment line: keeps proxies from timing the stream out and
+        # notices disconnected clients
+        return ': keep-alive\n\n'
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class EventStream:
+    """
+    Response body for one SSE client. The subscription is opened up front,
+    so a process at LIVE_UPDATES_MAX_STREAMS can still answer 503, and closed
+    by the server through close() even if the body was never iterated. The
+    stream ends after `max_seconds` so the browser reconnects (and re-syncs)
+    through a fresh request now and then.
+    """
+
+    def __init__(self, broker, channel: str, heartbeat: float, max_seconds: float):
+        self.channel = channel
+        self.heartbeat = heartbeat
+        self.max_seconds = max_seconds
+        self._subscription = broker.subscribe(channel)
+        self._queue = self._subscription.__enter__()
+        self._closed = False
+
+    def __iter__(self):
+        deadline = time.monotonic() + self.max_seconds
+        yield f"retry: {RECONNECT_MS}\n" + format_event({'channel': self.channel}, event='ready')
+        while not self._closed and time.monotonic() < deadline:
+            try:
+                yield format_event(self._queue.get(timeout=self.heartbeat))
+            except queue.Empty:
+                yield format_event()
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._subscription.__exit__(None, None, None)
+
+def stream_response(channel: str):
+    """An SSE response for the channel, or a 503 when this process is at its stream cap."""
+    config = current_app.config
+    try:
+        stream = EventStream(get_broker(), channel, config['LIVE_UPDATES_HEARTBEAT'],
+                             config['LIVE_UPDATES_MAX_SECONDS'])
+    except StreamLimitReached as e:
+        logger.warning(f"Refusing live update stream for {channel}: {str(e)}")
+        return jsonify({'error': 'Live updates are busy; falling back to polling.'}), 503
+    # The request context (and its database session) is torn down before the
+    # body is streamed, so an open stream holds no database connection.
+    response = current_app.response_class(stream, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,171 @@
+"""
+Prometheus metrics for the booking service.
+
+With PROMETHEUS_MULTIPROC_DIR set, every process writes its samples to that
+directory and /metrics aggregates them, whichever worker serves the scrape.
+gunicorn.conf.py sets it up for the workers. The outbox worker sends the
+emails, so the SMTP metrics only appear when it shares the directory, as
+the Replit deployment command arranges.
+"""
+import ipaddress
+import os
+import time
+from contextlib import contextmanager
+from flask import Response, abort, g, request
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram,
+                               CONTENT_TYPE_LATEST, generate_latest, multiprocess)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event, func
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+REQUEST_LATENCY = Histogram(
+    'booking_http_request_duration_seconds', 'Request latency by endpoint',
+    ['endpoint', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+REQUESTS = Counter(
+    'booking_http_requests_total', 'Requests by endpoint and status code',
+    ['endpoint', 'method', 'status']
+)
+DB_POOL_IN_USE = Gauge(
+    'booking_db_pool_connections_in_use', 'Connections checked out of the pool',
+    multiprocess_mode='livesum'
+)
+DB_POOL_CAPACITY = Gauge(
+    'booking_db_pool_capacity', 'Pool size plus max overflow',
+    multiprocess_mode='livesum'
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'booking_db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+DB_POOL_TIMEOUTS = Counter(
+    'booking_db_pool_timeouts_total', 'Checkouts that gave up after pool_timeout'
+)
+SMTP_SEND_LATENCY = Histogram(
+    'booking_smtp_send_duration_seconds', 'Time to hand one message to the SMTP server',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+SMTP_SEND_FAILURES = Counter(
+    'booking_smtp_send_failures_total', 'Messages the SMTP server did not accept'
+)
+CACHE_LOOKUPS = Counter(
+    'booking_cache_lookups_total', 'Cache lookups by cache and result',
+    ['cache', 'result']
+)
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+@contextmanager
+def track_smtp_send():
+    """Observe the latency of one SMTP send and count it if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        SMTP_SEND_FAILURES.inc()
+        raise
+    finally:
+        SMTP_SEND_LATENCY.observe(time.perf_counter() - started)
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+class OutboxCollector:
+    """Reads the outbox depth from the database at scrape time."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def collect(self):
+        from models import db, EmailOutbox
+
+        depth = GaugeMetricFamily('booking_email_outbox_depth', 'Outbox rows by status',
+                                  labels=['status'])
+        with self.app.app_context():
+            rows = db.session.query(EmailOutbox.status, func.count(EmailOutbox.id)) \
+                .group_by(EmailOutbox.status).all()
+            db.session.remove()
+        for status, count in rows:
+            depth.add_metric([status], count)
+        yield depth
+
+def record_pool_capacity(engine) -> None:
+    """
+    Set this process's pool capacity. A preloading gunicorn master must call
+    it again in each worker, since only the workers' gauges are summed.
+    """
+    pool = engine.pool
+    if hasattr(pool, 'size') and hasattr(pool, '_max_overflow'):
+        DB_POOL_CAPACITY.set(pool.size() + max(pool._max_overflow, 0))
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_IN_USE.inc()
+
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_IN_USE.dec()
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+
+def _observe_request(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+        REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+    return response
+
+def _scrape_allowed(app) -> bool:
+    token = app.config.get('METRICS_TOKEN')
+    if token:
+        return request.headers.get('Authorization') == f"Bearer {token}"
+    try:
+        return ipaddress.ip_address(request.remote_addr or '').is_loopback
+    except ValueError:
+        return False
+
+def build_registry(app) -> CollectorRegistry:
+    registry = CollectorRegistry()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        for collector in (REQUEST_LATENCY, REQUESTS, DB_POOL_IN_USE, DB_POOL_CAPACITY,
+                          DB_POOL_CHECKOUT_WAIT, DB_POOL_TIMEOUTS,
+                          SMTP_SEND_LATENCY, SMTP_SEND_FAILURES, CACHE_LOOKUPS):
+            registry.register(collector)
+    registry.register(OutboxCollector(app))
+    return registry
+
+def init_metrics(app, db):
+    """
+    Time every request and expose /metrics. Scrapes must come from loopback,
+    or carry `Authorization: Bearer <METRICS_TOKEN>` when that is configured.
+    """
+    if not event.contains(Pool, 'checkout', _on_checkout):
+        event.listen(Pool, 'checkout', _on_checkout)
+        event.listen(Pool, 'checkin', _on_checkin)
+    with app.app_context():
+        record_pool_capacity(db.engine)
+
+    app.before_request(_start_request)
+    app.after_request(_observe_request)
+    registry = build_registry(app)
+
+    @app.route('/metrics')
+    def metrics():
+        if not _scrape_allowed(app):
+            abort(403)
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
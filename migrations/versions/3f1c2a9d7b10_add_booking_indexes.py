@@ -0,0 +1,44 @@
+"""Add indexes for the booking hot-path predicates
+
+Revision ID: 3f1c2a9d7b10
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('unit', 'ix_unit_property_id', ['property_id']),
+    ('booking', 'ix_booking_unit_start_end', ['unit_id', 'start_date', 'end_date']),
+    ('booking', 'ix_booking_unit_status_start', ['unit_id', 'status', 'start_date']),
+    ('booking', 'ix_booking_status_start', ['status', 'start_date']),
+    ('booking', 'ix_booking_start_end', ['start_date', 'end_date']),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    # The tables predate this migration and are normally created by
+    # init_db(), which also creates these indexes on a fresh database.
+    for table, name, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for table, name, columns in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
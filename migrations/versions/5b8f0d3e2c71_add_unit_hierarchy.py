@@ -0,0 +1,72 @@
+"""Add unit hierarchy and closure table
+
+Revision ID: 5b8f0d3e2c71
+Revises: c27d9e4b1a36
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8f0d3e2c71'
+down_revision = 'c27d9e4b1a36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'parent_unit_id' not in {column['name'] for column in inspector.get_columns('unit')}:
+        with op.batch_alter_table('unit') as batch_op:
+            batch_op.add_column(sa.Column('parent_unit_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_unit_parent_unit_id_unit', 'unit', ['parent_unit_id'], ['id'])
+            batch_op.create_index('ix_unit_parent_unit_id', ['parent_unit_id'], unique=False)
+
+    if 'unit_closure' not in inspector.get_table_names():
+        op.create_table('unit_closure',
+            sa.Column('ancestor_id', sa.Integer(), nullable=False),
+            sa.Column('descendant_id', sa.Integer(), nullable=False),
+            sa.Column('depth', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['ancestor_id'], ['unit.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['descendant_id'], ['unit.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+        )
+        op.create_index('ix_unit_closure_descendant_ancestor', 'unit_closure', ['descendant_id', 'ancestor_id'], unique=False)
+
+    # Every "Firemeadow - <unit>" is part of its property's "Firemeadow - ALL"
+    bind.execute(sa.text("""
+        UPDATE unit SET parent_unit_id = (
+            SELECT composite.id FROM unit AS composite
+            WHERE composite.name = 'Firemeadow - ALL' AND composite.property_id = unit.property_id
+        )
+        WHERE name LIKE 'Firemeadow - %' AND name <> 'Firemeadow - ALL' AND parent_unit_id IS NULL
+    """))
+
+    # Rebuild the closure from the parent links
+    parents = dict(bind.execute(sa.text("SELECT id, parent_unit_id FROM unit")).fetchall())
+    rows = []
+    for unit_id in parents:
+        ancestor_id, depth, seen = unit_id, 0, set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            rows.append({'ancestor_id': ancestor_id, 'descendant_id': unit_id, 'depth': depth})
+            seen.add(ancestor_id)
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    bind.execute(sa.text("DELETE FROM unit_closure"))
+    if rows:
+        bind.execute(
+            sa.text("INSERT INTO unit_closure (ancestor_id, descendant_id, depth) VALUES (:ancestor_id, :descendant_id, :depth)"),
+            rows
+        )
+
+
+def downgrade():
+    op.drop_index('ix_unit_closure_descendant_ancestor', table_name='unit_closure')
+    op.drop_table('unit_closure')
+    with op.batch_alter_table('unit') as batch_op:
+        batch_op.drop_index('ix_unit_parent_unit_id')
+        batch_op.drop_constraint('fk_unit_parent_unit_id_unit', type_='foreignkey')
+        batch_op.drop_column('parent_unit_id')
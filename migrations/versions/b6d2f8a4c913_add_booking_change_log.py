@@ -0,0 +1,36 @@
+"""Add booking change log
+
+Revision ID: b6d2f8a4c913
+Revises: e91a5c7f3d28
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d2f8a4c913'
+down_revision = 'e91a5c7f3d28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'booking_change' in sa.inspect(op.get_bind()).get_table_names():
+        # Already created by init_db()
+        return
+    op.create_table('booking_change',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('booking_id', sa.Integer(), nullable=True),
+        sa.Column('operation', sa.String(length=10), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_booking_change_property_id', 'booking_change', ['property_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_booking_change_property_id', table_name='booking_change')
+    op.drop_table('booking_change')
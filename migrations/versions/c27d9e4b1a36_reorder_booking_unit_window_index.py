@@ -0,0 +1,36 @@
+"""Lead the per-unit booking window index on end_date
+
+Revision ID: c27d9e4b1a36
+Revises: 8a4e61c0d5f2
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27d9e4b1a36'
+down_revision = '8a4e61c0d5f2'
+branch_labels = None
+depends_on = None
+
+
+def _existing_indexes():
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('booking')}
+
+
+def upgrade():
+    existing = _existing_indexes()
+    if 'ix_booking_unit_start_end' in existing:
+        op.drop_index('ix_booking_unit_start_end', table_name='booking')
+    if 'ix_booking_unit_end_start' not in existing:
+        op.create_index('ix_booking_unit_end_start', 'booking', ['unit_id', 'end_date', 'start_date'], unique=False)
+
+
+def downgrade():
+    existing = _existing_indexes()
+    if 'ix_booking_unit_end_start' in existing:
+        op.drop_index('ix_booking_unit_end_start', table_name='booking')
+    if 'ix_booking_unit_start_end' not in existing:
+        op.create_index('ix_booking_unit_start_end', 'booking', ['unit_id', 'start_date', 'end_date'], unique=False)
@@ -0,0 +1,31 @@
+"""Add per-property booking change version
+
+Revision ID: e91a5c7f3d28
+Revises: 5b8f0d3e2c71
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91a5c7f3d28'
+down_revision = '5b8f0d3e2c71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('property')}
+    with op.batch_alter_table('property') as batch_op:
+        if 'bookings_version' not in columns:
+            batch_op.add_column(sa.Column('bookings_version', sa.Integer(), nullable=False, server_default='0'))
+        if 'bookings_changed_at' not in columns:
+            batch_op.add_column(sa.Column('bookings_changed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('property') as batch_op:
+        batch_op.drop_column('bookings_changed_at')
+        batch_op.drop_column('bookings_version')
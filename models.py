@@ -1,9 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy.orm import contains_eager
 from passlib.hash import argon2
+from datetime import datetime
+from db_routing import RoutingSession
 #import secrets
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -20,13 +23,31 @@ class Property(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
+    # Bumped whenever a booking or unit of the property changes; see booking_events
+    bookings_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    bookings_changed_at = db.Column(db.DateTime)
     units = db.relationship('Unit', backref='property', lazy=True)
 
 class Unit(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    property_id = db.Column(db.Integer, db.ForeignKey('property.id'), nullable=False)
+    property_id = db.Column(db.Integer, db.ForeignKey('property.id'), nullable=False, index=True)
+    # Composite units (e.g. "Firemeadow - ALL") are the parent of the units they cover
+    parent_unit_id = db.Column(db.Integer, db.ForeignKey('unit.id'), index=True)
     bookings = db.relationship('Booking', backref='unit', lazy=True)
+    parent = db.relationship('Unit', remote_side=[id], backref='children', lazy=True)
+
+class UnitClosure(db.Model):
+    """Precomputed ancestor/descendant pairs of the unit hierarchy, including each unit with itself."""
+    __tablename__ = 'unit_closure'
+    ancestor_id = db.Column(db.Integer, db.ForeignKey('unit.id', ondelete='CASCADE'), primary_key=True)
+    descendant_id = db.Column(db.Integer, db.ForeignKey('unit.id', ondelete='CASCADE'), primary_key=True)
+    depth = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        # The primary key serves descendant lookups; this serves ancestor lookups.
+        db.Index('ix_unit_closure_descendant_ancestor', 'descendant_id', 'ancestor_id'),
+    )
 
 class Booking(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -48,6 +69,73 @@ class Booking(db.Model):
     exclusive_use = db.Column(db.String(20), nullable=False)
     organization_status = db.Column(db.String(50), nullable=False)
 
+    __table_args__ = (
+        # Per-unit date-window overlap queries (calendar feed, availability).
+        # Leading on end_date keeps the range scan to bookings that end inside
+        # or after the window, rather than the unit's whole past history.
+        db.Index('ix_booking_unit_end_start', 'unit_id', 'end_date', 'start_date'),
+        # Upcoming bookings per unit on the property page.
+        db.Index('ix_booking_unit_status_start', 'unit_id', 'status', 'start_date'),
+        # Admin dashboard tables, which filter on status and order by start date.
+        db.Index('ix_booking_status_start', 'status', 'start_date'),
+        # Date-range filters that are not scoped to a unit (CSV export).
+        db.Index('ix_booking_start_end', 'start_date', 'end_date'),
+    )
+
 class NotificationEmail(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
+
+class EmailOutbox(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey('booking.id', ondelete='SET NULL'))
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    recipients = db.Column(db.Text, nullable=False)
+    ical_attachment = db.Column(db.LargeBinary)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # The worker polls for due pending messages.
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    @property
+    def recipient_list(self):
+        return [email for email in self.recipients.split(',') if email]
+
+class BookingChange(db.Model):
+    """
+    Append-only log of booking changes per property, written by booking_events.
+    The id is the sync token calendar clients pass back to fetch later changes.
+    """
+    __tablename__ = 'booking_change'
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, nullable=False)
+    # No foreign key: the row must outlive a deleted booking as its tombstone
+    booking_id = db.Column(db.Integer)
+    # 'upsert', 'delete', or 'reset' when a unit changed and clients must reload
+    operation = db.Column(db.String(10), nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Changes of one property after a token
+        db.Index('ix_booking_change_property_id', 'property_id', 'id'),
+    )
+
+def booking_with_unit_property():
+    """Booking query joined to its unit and property, loading both in the same SELECT.
+
+    Callers can filter or order on Unit and Property columns directly, and
+    reading booking.unit.name or booking.unit.property.name afterwards does
+    not issue any further queries.
+    """
+    return (Booking.query
+            .join(Booking.unit)
+            .join(Unit.property)
+            .options(contains_eager(Booking.unit).contains_eager(Unit.property)))
@@ -0,0 +1,96 @@
+"""
+Booking notification emails, queued in the outbox with the caller's transaction.
+"""
+import logging
+from flask import current_app, flash
+from models import NotificationEmail
+from email_utils import create_ical_invite
+from outbox import queue_email
+
+logger = logging.getLogger(__name__)
+
+def notify_admins(booking):
+    try:
+        logger.info(f"Starting notify_admins for booking ID: {booking.id}")
+        
+        # First check if we have any admin emails
+        admin_emails = [email.email for email in NotificationEmail.query.all()]
+        logger.info(f"Found {len(admin_emails)} admin email(s): {admin_emails}")
+        
+        if not admin_emails:
+            logger.error("No admin emails configured in the system. Please add admin emails through the admin interface.")
+            flash('Warning: No admin emails configured. Please configure admin notification emails.', 'warning')
+            return False
+
+        # Check if environment variables are set
+        if not current_app.config.get('MAIL_USERNAME') or not current_app.config.get('MAIL_PASSWORD'):
+            logger.error("MAIL_USERNAME or MAIL_PASSWORD not configured")
+            return False
+
+        subject = f"New Booking Request: {booking.guest_name}"
+        logger.info(f"Preparing email for booking {booking.id} by {booking.guest_name}")
+        
+        body = f"""A new booking request has been submitted:
+Guest: {booking.guest_name}
+Unit: {booking.unit.name}
+Dates: {booking.start_date} to {booking.end_date}
+Arrival Time: {booking.arrival_time}
+Departure Time: {booking.departure_time}
+Number of Guests: {booking.num_guests}
+Catering Option: {booking.catering_option}
+Special Requests: {booking.special_requests}
+Mobility Impaired: {'Yes' if booking.mobility_impaired else 'No'}
+Event Manager Contact: {booking.event_manager_contact}
+Offsite Emergency Contact: {booking.offsite_emergency_contact}
+Mitchell Sponsor: {booking.mitchell_sponsor}
+Exclusive Use: {booking.exclusive_use}
+Organization Status: {booking.organization_status}"""
+
+        # Create calendar invite
+        logger.info("Creating calendar invite...")
+        ical_attachment = create_ical_invite(booking)
+        if not ical_attachment:
+            logger.warning("Failed to create calendar invite, sending email without attachment")
+        else:
+            logger.info("Calendar invite created successfully")
+        
+        # Queue the email for the outbox worker; the caller's commit makes it deliverable
+        logger.info(f"Queueing email to {len(admin_emails)} admin(s)")
+        return queue_email(subject, body, admin_emails, ical_attachment, booking_id=booking.id)
+
+    except Exception as e:
+        logger.error(f'Error in notify_admins for booking {booking.id}: {str(e)}', exc_info=True)
+        flash('Error sending admin notification', 'error')
+        return False
+
+def notify_guest(booking):
+    try:
+        subject = f"Booking {booking.status.capitalize()}: {booking.unit.property.name}"
+        body = f"""{booking.guest_name}, your booking request for {booking.unit.name} from {booking.start_date} to {booking.end_date} has been {booking.status}.
+Arrival Time: {booking.arrival_time}
+Departure Time: {booking.departure_time}
+Number of Guests: {booking.num_guests}
+Catering Option: {booking.catering_option}
+Special Requests: {booking.special_requests}
+Mobility Impaired: {'Yes' if booking.mobility_impaired else 'No'}
+Event Manager Contact: {booking.event_manager_contact}
+Offsite Emergency Contact: {booking.offsite_emergency_contact}
+Mitchell Sponsor: {booking.mitchell_sponsor}
+Exclusive Use: {booking.exclusive_use}
+Organization Status: {booking.organization_status}"""
+
+        ical_attachment = create_ical_invite(booking) if booking.status == 'approved' else None
+        recipients = [booking.guest_email]
+
+        if booking.status == 'approved':
+            admin_emails = [email.email for email in NotificationEmail.query.all()]
+            if admin_emails:
+                recipients.extend(admin_emails)
+
+        message = queue_email(subject, body, recipients, ical_attachment, booking_id=booking.id)
+        logger.info(f"Guest notification queued for booking {booking.id}")
+        return message
+
+    except Exception as e:
+        logger.error(f'Error in notify_guest for booking {booking.id}: {str(e)}')
+        return False
@@ -0,0 +1,112 @@
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+from flask import current_app
+from models import db, EmailOutbox
+from email_utils import get_smtp_pool, send_email
+
+def queue_email(subject: str, body: str, recipients: List[str],
+                ical_attachment: Optional[bytes] = None, booking_id: Optional[int] = None) -> EmailOutbox:
+    """
+    Add an email to the outbox. The caller's commit makes it visible to the worker,
+    so it is queued atomically with the change that triggered it.
+    """
+    message = EmailOutbox(
+        booking_id=booking_id,
+        subject=subject,
+        body=body,
+        recipients=','.join(recipients),
+        ical_attachment=ical_attachment,
+        status='pending',
+        attempts=0,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.session.add(message)
+    current_app.logger.info(f"Queued email '{subject}' for {len(recipients)} recipient(s)")
+    return message
+
+def record_failed_attempt(message: EmailOutbox, error: Exception) -> None:
+    """
+    Count a failed delivery attempt and schedule the retry, or give up after
+    OUTBOX_MAX_ATTEMPTS. The caller commits the updated row.
+    """
+    message.attempts += 1
+    message.last_error = str(error)
+    if message.attempts >= current_app.config['OUTBOX_MAX_ATTEMPTS']:
+        message.status = 'failed'
+        current_app.logger.error(f"Giving up on outbox email {message.id} after {message.attempts} attempts: {str(error)}")
+    else:
+        wait_time = current_app.config['OUTBOX_RETRY_BASE_SECONDS'] * 2 ** (message.attempts - 1)
+        message.next_attempt_at = datetime.utcnow() + timedelta(seconds=wait_time)
+        current_app.logger.warning(
+            f"Outbox email {message.id} attempt {message.attempts} failed. Retrying in {wait_time} seconds... Error: {str(error)}"
+        )
+
+def deliver_email(message: EmailOutbox, smtp=None) -> bool:
+    """
+    Make one delivery attempt and record the outcome on the outbox row.
+    The caller commits the updated row.
+    """
+    try:
+        send_email(message.subject, message.body, message.recipient_list, message.ical_attachment, smtp=smtp)
+    except Exception as e:
+        record_failed_attempt(message, e)
+        return False
+
+    message.attempts += 1
+    message.status = 'sent'
+    message.sent_at = datetime.utcnow()
+    message.last_error = None
+    return True
+
+def deliver_due_emails(limit: Optional[int] = None) -> int:
+    """
+    Deliver pending outbox emails whose next attempt is due. Returns the number sent.
+    """
+    limit = limit or current_app.config['OUTBOX_BATCH_SIZE']
+    # SKIP LOCKED lets several workers drain the outbox without sending the
+    # same message twice; the rows stay locked until the batch is committed.
+    # It is a no-op on SQLite.
+    due = EmailOutbox.query.filter(
+        EmailOutbox.status == 'pending',
+        EmailOutbox.next_attempt_at <= datetime.utcnow()
+    ).order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    sent = 0
+    attempted = set()
+    if due:
+        try:
+            # The whole batch goes out over one SMTP connection
+            with get_smtp_pool().session() as smtp:
+                for message in due:
+                    attempted.add(message.id)
+                    if deliver_email(message, smtp):
+                        sent += 1
+        except Exception as e:
+            # deliver_email() records its own failures, so this is the connection itself
+            current_app.logger.error(f"SMTP connection for the outbox failed: {str(e)}")
+            for message in due:
+                if message.id not in attempted:
+                    record_failed_attempt(message, e)
+    db.session.commit()
+    return sent
+
+def run_worker(once: bool = False) -> None:
+    """
+    Poll the outbox and deliver due emails until interrupted
+    """
+    poll_interval = current_app.config['OUTBOX_POLL_INTERVAL']
+    current_app.logger.info(f"Outbox worker started, polling every {poll_interval} seconds")
+    while True:
+        try:
+            sent = deliver_due_emails()
+            if sent:
+                current_app.logger.info(f"Outbox worker sent {sent} email(s)")
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Outbox worker error: {str(e)}", exc_info=True)
+        finally:
+            db.session.remove()
+        if once:
+            return
+        time.sleep(poll_interval)
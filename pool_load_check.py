@@ -0,0 +1,91 @@
+import os
+import sys
+import tempfile
+import threading
+import time as timer
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'pool_load_check.db')
+os.environ['DATABASE_URL'] = os.environ.get('LOAD_CHECK_DATABASE_URL', f'sqlite:///{DB_PATH}')
+os.environ.setdefault('ADMIN_PASSPHRASE', 'check-admin')
+os.environ.setdefault('USER_PASSPHRASE', 'check-user')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+# A deliberately small pool, so the clients below have to queue for connections
+os.environ.setdefault('DB_POOL_SIZE', '4')
+os.environ.setdefault('DB_MAX_OVERFLOW', '2')
+os.environ.setdefault('DB_POOL_TIMEOUT', '10')
+
+from prometheus_client import REGISTRY
+from main import app, db, init_db
+from models import Property
+
+# Concurrent logged-in clients, and requests each of them makes
+CONCURRENCY = int(os.environ.get('LOAD_CHECK_CONCURRENCY', 24))
+REQUESTS_PER_CLIENT = int(os.environ.get('LOAD_CHECK_REQUESTS', 25))
+# Every pool checkout must get a connection within this many seconds
+# (one of the checkout wait histogram's bucket bounds)
+WAIT_BUDGET = '1.0'
+
+def sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+def client_loop(urls, statuses, failures):
+    client = app.test_client()
+    client.post('/login', data={'passphrase': app.config['ADMIN_PASSPHRASE']})
+    for i in range(REQUESTS_PER_CLIENT):
+        url = urls[i % len(urls)]
+        try:
+            statuses.append((url, client.get(url).status_code))
+        except Exception as e:
+            failures.append(f"{url}: {e}")
+
+if os.environ['DATABASE_URL'].startswith('sqlite:///') and os.path.exists(DB_PATH):
+    os.remove(DB_PATH)
+init_db()
+app.config['WTF_CSRF_ENABLED'] = False
+
+with app.app_context():
+    property_ids = [p.id for p in Property.query.all()]
+urls = ['/', '/admin'] + [f'/property/{pid}' for pid in property_ids] \
+    + [f'/api/bookings/{pid}' for pid in property_ids]
+
+statuses, failures = [], []
+threads = [threading.Thread(target=client_loop, args=(urls, statuses, failures)) for _ in range(CONCURRENCY)]
+started = timer.perf_counter()
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+elapsed = timer.perf_counter() - started
+
+with app.app_context():
+    pool = db.engine.pool
+    capacity = pool.size() + max(pool._max_overflow, 0)
+checkouts = sample('booking_db_pool_checkout_wait_seconds_count')
+within_budget = sample('booking_db_pool_checkout_wait_seconds_bucket', {'le': WAIT_BUDGET})
+wait_total = sample('booking_db_pool_checkout_wait_seconds_sum')
+timeouts = sample('booking_db_pool_timeouts_total')
+in_use = sample('booking_db_pool_connections_in_use')
+errors = [(url, status) for url, status in statuses if status != 200]
+
+print(f"{CONCURRENCY} clients x {REQUESTS_PER_CLIENT} requests against a pool of {capacity} connections "
+      f"in {elapsed:.2f}s ({len(statuses) / elapsed:.0f} req/s)")
+print(f"  checkouts: {checkouts:.0f}, mean wait {wait_total / checkouts * 1000 if checkouts else 0:.2f}ms, "
+      f"within {WAIT_BUDGET}s: {within_budget:.0f}")
+print(f"  pool timeouts: {timeouts:.0f}, connections still checked out: {in_use:.0f}")
+
+failed = False
+if failures or errors:
+    print(f"\n{len(failures)} request(s) raised and {len(errors)} returned an error status:")
+    for line in failures[:5] + [f"{url}: HTTP {status}" for url, status in errors[:5]]:
+        print(f"  {line}")
+    failed = True
+if timeouts or within_budget < checkouts:
+    print(f"\n{checkouts - within_budget:.0f} checkout(s) waited longer than {WAIT_BUDGET}s.")
+    failed = True
+if in_use:
+    print("\nConnections were not returned to the pool.")
+    failed = True
+
+if failed:
+    sys.exit(1)
+print("\nNo connection errors and checkout latency stayed within budget.")
@@ -0,0 +1,106 @@
+import os
+import sys
+import tempfile
+from datetime import date, time, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'query_count_check.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ.setdefault('ADMIN_PASSPHRASE', 'check-admin')
+os.environ.setdefault('USER_PASSPHRASE', 'check-user')
+
+from sqlalchemy import event, func
+from main import app, db, init_db
+from models import Unit, Booking, BookingChange
+
+# Booking counts to compare; a listing path must issue the same number of
+# queries for each of them.
+SIZES = [5, 200]
+
+queries = []
+
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    queries.append(statement)
+
+def add_bookings(count):
+    units = Unit.query.all()
+    start = date.today()
+    for i in range(count):
+        db.session.add(Booking(
+            unit_id=units[i % len(units)].id,
+            start_date=start + timedelta(days=i % 20),
+            end_date=start + timedelta(days=i % 20 + 2),
+            arrival_time=time(14, 0),
+            departure_time=time(11, 0),
+            guest_name=f"Guest {i}",
+            guest_email=f"guest{i}@example.com",
+            num_guests=2,
+            status='approved' if i % 2 else 'pending',
+            catering_option="Bring own food",
+            special_requests="None",
+            mobility_impaired=False,
+            event_manager_contact="Manager",
+            offsite_emergency_contact="Emergency",
+            mitchell_sponsor="Sponsor",
+            exclusive_use="Open to sharing",
+            organization_status="Personal use"
+        ))
+    db.session.commit()
+
+def count_route_queries(client, url):
+    queries.clear()
+    response = client.get(url)
+    if response.status_code != 200:
+        raise RuntimeError(f"{url} returned {response.status_code}")
+    return len(queries)
+
+if os.path.exists(DB_PATH):
+    os.remove(DB_PATH)
+app.config['WTF_CSRF_ENABLED'] = False
+init_db()
+
+with app.app_context():
+    unit_id, property_id = db.session.query(Unit.id, Unit.property_id).first()
+    # Sync token from before any booking is added, so the changes route returns them all
+    changes_token = db.session.query(func.max(BookingChange.id)).scalar() or 0
+    event.listen(db.engine, 'before_cursor_execute', count_query)
+
+routes = [
+    '/',
+    f'/property/{property_id}',
+    f'/api/bookings/{property_id}',
+    f'/api/bookings/{property_id}/changes?since={changes_token}',
+    f'/ical/property/{property_id}.ics',
+    f'/ical/unit/{unit_id}.ics',
+    '/admin',
+    '/admin/download_csv',
+    '/book',
+]
+
+client = app.test_client()
+client.post('/login', data={'passphrase': app.config['ADMIN_PASSPHRASE']})
+# Warm per-process caches (e.g. the logged-in user) so every measured request sees the same state
+client.get('/')
+
+counts = {}
+total = 0
+for size in SIZES:
+    with app.app_context():
+        add_bookings(size - total)
+    total = size
+    for url in routes:
+        counts.setdefault(url, []).append(count_route_queries(client, url))
+
+print("Queries per request:")
+failures = []
+for url, per_size in counts.items():
+    summary = ', '.join(f"{size} bookings: {count}" for size, count in zip(SIZES, per_size))
+    print(f"  - {url}: {summary}")
+    if len(set(per_size)) > 1:
+        failures.append(url)
+
+if failures:
+    print("\nQuery count grows with the number of bookings on:")
+    for url in failures:
+        print(f"  - {url}")
+    sys.exit(1)
+print("\nAll routes issue a fixed number of queries.")
@@ -0,0 +1,98 @@
+import sys
+from datetime import date
+from flask import Flask
+from sqlalchemy import select, or_
+from models import db, Unit, Booking
+from config import Config
+
+app = Flask(__name__)
+app.config.from_object(Config)
+db.init_app(app)
+
+# Tables that must never be read with a full sequential scan on a hot path.
+CHECKED_TABLES = {'booking'}
+
+def hot_queries():
+    today = date.today()
+    window_start = date(today.year, today.month, 1)
+    window_end = date(today.year + (today.month == 12), today.month % 12 + 1, 1)
+    return {
+        "property_details upcoming bookings": select(Booking).join(Unit).where(
+            Unit.property_id == 1,
+            or_(Booking.status == 'approved', Booking.status == 'pending'),
+            Booking.start_date >= today
+        ).order_by(Booking.start_date),
+        "get_bookings calendar window": select(Booking).join(Unit).where(
+            Unit.property_id == 1,
+            Booking.status != 'rejected',
+            Booking.start_date < window_end,
+            Booking.end_date >= window_start
+        ),
+        "availability conflict check": select(Booking).where(
+            Booking.unit_id.in_([1, 2]),
+            Booking.start_date <= window_end,
+            Booking.end_date >= window_start
+        ),
+        "admin pending bookings": select(Booking).where(
+            Booking.status == 'pending'
+        ).order_by(Booking.start_date, Booking.id),
+        "admin approved bookings": select(Booking).where(
+            Booking.status == 'approved'
+        ).order_by(Booking.start_date, Booking.id),
+        "download_csv date range": select(Booking).where(
+            Booking.start_date < window_end,
+            Booking.end_date >= window_start
+        ),
+    }
+
+def explain(connection, statement):
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={'render_postcompile': True})
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    if connection.dialect.name == 'postgresql':
+        rows = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar()
+        return list(walk_postgres_plan(rows[0]['Plan']))
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+        return [row[-1] for row in rows]
+    raise RuntimeError(f"Unsupported database dialect: {connection.dialect.name}")
+
+def walk_postgres_plan(node):
+    yield f"{node['Node Type']} {node.get('Relation Name', '')} {node.get('Index Name', '')}".strip()
+    for child in node.get('Plans', []):
+        yield from walk_postgres_plan(child)
+
+def is_sequential_scan(step):
+    words = step.split()
+    if len(words) < 2:
+        return False
+    if step.startswith('Seq Scan'):
+        return words[2] in CHECKED_TABLES
+    # SQLite reports full table scans as "SCAN <table>", optionally with a
+    # covering index; anything that isn't a SEARCH reads every row.
+    return words[0] == 'SCAN' and words[1] in CHECKED_TABLES
+
+with app.app_context():
+    failures = []
+    with db.engine.connect() as connection:
+        if connection.dialect.name == 'postgresql':
+            # Small tables make the planner prefer seq scans regardless of the
+            # available indexes, so ask whether an index *can* serve the query.
+            connection.exec_driver_sql("SET enable_seqscan = off")
+
+        for name, statement in hot_queries().items():
+            plan = explain(connection, statement)
+            print(f"\n{name}:")
+            for step in plan:
+                print(f"  - {step}")
+            if any(is_sequential_scan(step) for step in plan):
+                failures.append(name)
+
+    if failures:
+        print("\nSequential scans found in hot queries:")
+        for name in failures:
+            print(f"  - {name}")
+        sys.exit(1)
+    print("\nAll hot queries are served by indexes.")
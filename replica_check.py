@@ -0,0 +1,95 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, time as clock, timedelta
+
+PRIMARY_PATH = os.path.join(tempfile.gettempdir(), 'replica_check_primary.db')
+REPLICA_PATH = os.path.join(tempfile.gettempdir(), 'replica_check_replica.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{PRIMARY_PATH}'
+os.environ['DATABASE_REPLICA_URL'] = f'sqlite:///{REPLICA_PATH}'
+os.environ['DB_PRIMARY_PIN_SECONDS'] = '2'
+os.environ.setdefault('ADMIN_PASSPHRASE', 'check-admin')
+os.environ.setdefault('USER_PASSPHRASE', 'check-user')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from main import app, db, init_db
+from models import Unit, Booking
+
+failures = []
+
+def check(description, condition):
+    print(f"{'ok  ' if condition else 'FAIL'} {description}")
+    if not condition:
+        failures.append(description)
+
+def add_booking(unit, guest, offset):
+    start = date.today() + timedelta(days=offset)
+    db.session.add(Booking(
+        unit_id=unit.id, start_date=start, end_date=start + timedelta(days=2),
+        arrival_time=clock(14, 0), departure_time=clock(11, 0),
+        guest_name=guest, guest_email='guest@example.com', num_guests=2, status='approved',
+        catering_option='Bring own food', special_requests='', mobility_impaired=False,
+        event_manager_contact='Manager', offsite_emergency_contact='Emergency',
+        mitchell_sponsor='Sponsor', exclusive_use='Open to sharing', organization_status='Personal use'
+    ))
+    db.session.commit()
+
+def feed_guests(client, property_id):
+    events = client.get(f'/api/bookings/{property_id}').get_json()
+    return {event['title'].removeprefix('PENDING - ').split(' - ')[0] for event in events}
+
+def login(passphrase):
+    client = app.test_client()
+    client.post('/login', data={'passphrase': passphrase})
+    return client
+
+for path in (PRIMARY_PATH, REPLICA_PATH):
+    if os.path.exists(path):
+        os.remove(path)
+init_db()
+app.config['WTF_CSRF_ENABLED'] = False
+
+with app.app_context():
+    unit = Unit.query.first()
+    unit_id, property_id = unit.id, unit.property_id
+    add_booking(unit, 'Replicated', 10)
+    db.engines['replica'].dispose()
+    # The replica is a snapshot of the primary; later writes only reach the primary
+    shutil.copy(PRIMARY_PATH, REPLICA_PATH)
+    add_booking(unit, 'Lagging', 20)
+
+writer = login(app.config['ADMIN_PASSPHRASE'])
+reader = login(app.config['USER_PASSPHRASE'])
+
+check("read-only route is served by the replica",
+      feed_guests(writer, property_id) == {'Replicated'})
+
+start = date.today() + timedelta(days=30)
+response = writer.post('/book', data={
+    'unit_id': unit_id, 'start_date': start.isoformat(), 'end_date': (start + timedelta(days=2)).isoformat(),
+    'arrival_time': '14:00', 'departure_time': '11:00', 'guest_name': 'Own Write',
+    'guest_email': 'own@example.com', 'num_guests': 2, 'catering_option': 'Bring own food',
+    'mobility_impaired': 'No', 'event_manager_contact': 'Manager', 'offsite_emergency_contact': 'Emergency',
+    'mitchell_sponsor': 'Sponsor', 'exclusive_use': 'Open to sharing', 'organization_status': 'Personal use'
+})
+check("booking is written to the primary", response.status_code == 302)
+check("the writer reads its own write from the primary",
+      feed_guests(writer, property_id) == {'Replicated', 'Lagging', 'Own Write'})
+check("other users keep reading the replica",
+      feed_guests(reader, property_id) == {'Replicated'})
+
+time.sleep(app.config['DB_PRIMARY_PIN_SECONDS'] + 0.5)
+check("the writer returns to the replica once the pin expires",
+      feed_guests(writer, property_id) == {'Replicated'})
+
+csv = writer.get('/admin/download_csv').get_data(as_text=True)
+check("the CSV export streams from the replica", 'Replicated' in csv and 'Lagging' not in csv)
+
+with app.app_context():
+    check("the primary holds every booking", Booking.query.count() == 3)
+
+if failures:
+    sys.exit(1)
+print("\nRead-only routes use the replica and writers read their own writes.")
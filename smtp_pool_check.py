@@ -0,0 +1,97 @@
+# Exercises the SMTP connection pool against a local aiosmtpd server (pip install aiosmtpd).
+import sys
+import time
+import logging
+from flask import Flask
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from email_utils import build_message, get_smtp_pool, send_email
+from config import Config
+
+# aiosmtpd logs a warning about its own deprecated session attribute during AUTH.
+logging.getLogger('mail.log').setLevel(logging.ERROR)
+
+HOST = '127.0.0.1'
+PORT = 8025
+
+class CountingHandler:
+    """Local stand-in for the mail server that counts sessions and messages."""
+
+    def __init__(self):
+        self.connections = 0
+        self.messages = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        # smtplib sends EHLO once per connection when STARTTLS is off.
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return '250 Message accepted for delivery'
+
+def start_server(handler):
+    controller = Controller(
+        handler, hostname=HOST, port=PORT,
+        authenticator=lambda server, session, envelope, mechanism, auth_data: AuthResult(success=True),
+        auth_require_tls=False
+    )
+    controller.start()
+    return controller
+
+app = Flask(__name__)
+app.config.from_object(Config)
+app.config.update(
+    MAIL_SERVER=HOST,
+    MAIL_PORT=PORT,
+    MAIL_USE_TLS=False,
+    MAIL_USERNAME='pool-check@example.com',
+    MAIL_PASSWORD='secret',
+    MAIL_POOL_IDLE_TIMEOUT=3,
+)
+
+handler = CountingHandler()
+failures = []
+
+def check(name, expected_connections, expected_messages):
+    print(f"{name}: {handler.connections} connection(s), {handler.messages} message(s)")
+    if (handler.connections, handler.messages) != (expected_connections, expected_messages):
+        failures.append(f"{name}: expected {expected_connections} connection(s) and {expected_messages} message(s)")
+
+def send(count):
+    for i in range(count):
+        send_email(f"Pool check {i}", "Body", ['guest@example.com', 'admin@example.com'], b'BEGIN:VCALENDAR')
+
+with app.app_context():
+    controller = start_server(handler)
+    try:
+        send(5)
+        check("Five sends in a row", 1, 5)
+
+        # The server drops the idle session; the pool must reconnect transparently.
+        controller.stop()
+        controller = start_server(handler)
+        send(1)
+        check("Send after server restart", 2, 6)
+
+        # Sessions idle for longer than MAIL_POOL_IDLE_TIMEOUT are not reused.
+        time.sleep(app.config['MAIL_POOL_IDLE_TIMEOUT'] + 0.5)
+        send(1)
+        check("Send after idle timeout", 3, 7)
+
+        # Several messages over one explicitly borrowed session.
+        with get_smtp_pool().session() as session:
+            for i in range(3):
+                session.send_message(build_message(f"Session check {i}", "Body", ['guest@example.com']))
+        check("Three sends over one session", 3, 10)
+        get_smtp_pool().close()
+    finally:
+        controller.stop()
+
+if failures:
+    print("\nSMTP pool check failed:")
+    for failure in failures:
+        print(f"  - {failure}")
+    sys.exit(1)
+print("\nSMTP pool reuses and re-establishes connections as expected.")
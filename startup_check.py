@@ -0,0 +1,70 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'startup_check.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ.setdefault('ADMIN_PASSPHRASE', 'check-admin')
+os.environ.setdefault('USER_PASSPHRASE', 'check-user')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+# Cold starts to time; each one is a fresh interpreter, like a new worker
+RUNS = 5
+# Median seconds allowed from interpreter start to a ready app
+BUDGET = float(os.environ.get('STARTUP_BUDGET', 2.0))
+# Modules that only some requests need and must not load at startup
+DEFERRED_MODULES = ['icalendar', 'smtplib', 'email.mime.multipart']
+
+# Runs in each child: time the imports and create_app(), then a boot-time
+# init_db() against the already initialised database.
+PROBE = """
+import sys, time
+started = time.perf_counter()
+from application import create_app, init_db
+app = create_app()
+created = time.perf_counter()
+loaded = [name for name in {deferred!r} if name in sys.modules]
+init_db(app)
+print(created - started, time.perf_counter() - created, ','.join(loaded))
+"""
+
+def cold_start():
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', PROBE.format(deferred=DEFERRED_MODULES)],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True).stdout
+    total = time.perf_counter() - started
+    create, init, *loaded = output.strip().splitlines()[-1].split(' ')
+    return total, float(create), float(init), ','.join(loaded).split(',') if loaded else []
+
+if os.path.exists(DB_PATH):
+    os.remove(DB_PATH)
+# The first run creates the schema and sample data; later runs see an existing database
+cold_start()
+
+totals, creates, inits, loaded = [], [], [], set()
+for _ in range(RUNS):
+    total, create, init, modules = cold_start()
+    totals.append(total)
+    creates.append(create)
+    inits.append(init)
+    loaded.update(modules)
+
+print(f"Cold start (process spawn to ready app): median {statistics.median(totals):.3f}s, max {max(totals):.3f}s")
+print(f"  imports + create_app(): median {statistics.median(creates):.3f}s")
+print(f"  init_db() on an existing database: median {statistics.median(inits) * 1000:.1f}ms")
+
+failed = False
+if statistics.median(totals) > BUDGET:
+    print(f"\nCold start exceeds the {BUDGET:.1f}s budget (STARTUP_BUDGET).")
+    failed = True
+if loaded:
+    print(f"\nLoaded at startup but should be deferred: {', '.join(sorted(loaded))}")
+    failed = True
+
+if failed:
+    sys.exit(1)
+print("\nStartup is within budget.")
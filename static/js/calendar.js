@@ -1,3 +1,37 @@
+// How often an open calendar asks for booking changes when the server
+// cannot push them (no EventSource, or the event stream was refused)
+var CHANGES_POLL_INTERVAL = 30000;
+var changesToken = null;
+
+function colourEvent(eventData) {
+    // The feed only carries status; colour events from it here
+    eventData.color = eventData.status === 'pending' ? '#a8d08d' : '#378006';
+    return eventData;
+}
+
+function fetchChanges(since) {
+    var url = '/api/bookings/' + propertyId + '/changes' + (since === null ? '' : '?since=' + since);
+    return fetch(url, { cache: 'no-store' }).then(function(response) { return response.json(); });
+}
+
+function applyChanges(calendar, changes) {
+    // Added events join the feed's source, so navigating away and back replaces them
+    var source = calendar.getEventSources()[0];
+    changes.deletes.forEach(function(bookingId) {
+        var event = calendar.getEventById(bookingId);
+        if (event) {
+            event.remove();
+        }
+    });
+    changes.upserts.forEach(function(eventData) {
+        var event = calendar.getEventById(eventData.id);
+        if (event) {
+            event.remove();
+        }
+        calendar.addEvent(colourEvent(eventData), source);
+    });
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     var calendarEl = document.getElementById('calendar');
     var isMobile = window.innerWidth < 768;
@@ -16,9 +50,10 @@ document.addEventListener('DOMContentLoaded', function() {
             right: 'dayGridMonth,timeGridWeek'
         },
         events: '/api/bookings/' + propertyId,
+        eventDataTransform: colourEvent,
         eventClick: function(info) {
             if (isAdmin) {
-                showBookingDetails(info.event);
+                loadBookingDetails(info.event);
             } else {
                 alert('Booking details are only visible to administrators.');
             }
@@ -30,7 +65,59 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
-    calendar.render();
+    // Take the change log token before the first feed load, so nothing that
+    // changes in between is missed; applying a change twice is harmless.
+    fetchChanges(null).then(function(data) {
+        changesToken = data.token;
+        listenForChanges();
+    }).catch(function(error) {
+        // Still show the calendar; it just will not update in place
+        console.error('Error:', error);
+    }).finally(function() {
+        calendar.render();
+        adjustCalendarHeight();
+    });
+
+    // Apply the bookings changed since the last sync instead of reloading the window
+    function syncChanges() {
+        if (document.hidden || changesToken === null || calendarEl.style.display === 'none') {
+            return;
+        }
+        fetchChanges(changesToken).then(function(data) {
+            if (data.reset) {
+                calendar.refetchEvents();
+            } else {
+                applyChanges(calendar, data);
+            }
+            changesToken = data.token;
+        }).catch(function(error) {
+            console.error('Error:', error);
+        });
+    }
+
+    // The server announces committed changes on the property; each
+    // announcement (and each reconnect, which may have missed some) is the
+    // cue to sync. Polling is only the fallback.
+    function listenForChanges() {
+        if (!window.EventSource) {
+            setInterval(syncChanges, CHANGES_POLL_INTERVAL);
+            return;
+        }
+        var events = new EventSource('/api/bookings/' + propertyId + '/events');
+        events.addEventListener('ready', syncChanges);
+        events.addEventListener('change', syncChanges);
+        events.addEventListener('error', function() {
+            if (events.readyState === EventSource.CLOSED) {
+                var poller = setInterval(syncChanges, CHANGES_POLL_INTERVAL);
+                setTimeout(function() {
+                    clearInterval(poller);
+                    listenForChanges();
+                }, 10 * CHANGES_POLL_INTERVAL);
+            }
+        });
+    }
+
+    document.addEventListener('visibilitychange', syncChanges);
 
     // Adjust calendar height (now only for non-mobile)
     function adjustCalendarHeight() {
@@ -40,8 +127,6 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    adjustCalendarHeight();
-    
     window.addEventListener('resize', function() {
         var newIsMobile = window.innerWidth < 768;
         if (newIsMobile !== isMobile) {
@@ -57,7 +142,24 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
-function showBookingDetails(event) {
+function loadBookingDetails(event) {
+    // Details are fetched on demand so the calendar feed stays small
+    fetch('/api/booking/' + event.id)
+        .then(function(response) { return response.json(); })
+        .then(function(details) {
+            if (details.error) {
+                alert(details.error);
+                return;
+            }
+            showBookingDetails(event, details);
+        })
+        .catch(function(error) {
+            console.error('Error:', error);
+            alert('An error occurred while loading the booking details');
+        });
+}
+
+function showBookingDetails(event, details) {
     var modal = document.getElementById('bookingModal');
     var modalTitle = document.getElementById('modalTitle');
     var modalBody = document.getElementById('modalBody');
@@ -66,20 +168,20 @@ function showBookingDetails(event) {
     modalBody.innerHTML = `
         <p><strong>Start Date:</strong> ${event.start.toLocaleDateString()}</p>
         <p><strong>End Date:</strong> ${event.end.toLocaleDateString()}</p>
-        <p><strong>Arrival Time:</strong> ${event.extendedProps.arrivalTime}</p>
-        <p><strong>Departure Time:</strong> ${event.extendedProps.departureTime}</p>
-        <p><strong>Guest Name:</strong> ${event.extendedProps.guestName}</p>
-        <p><strong>Guest Email:</strong> ${event.extendedProps.guestEmail}</p>
-        <p><strong>Number of Guests:</strong> ${event.extendedProps.numGuests}</p>
-        <p><strong>Catering Option:</strong> ${event.extendedProps.cateringOption}</p>
-        <p><strong>Special Requests:</strong> ${event.extendedProps.specialRequests || 'None'}</p>
-        <p><strong>Mobility Impaired:</strong> ${event.extendedProps.mobilityImpaired}</p>
-        <p><strong>Event Manager Contact:</strong> ${event.extendedProps.eventManagerContact}</p>
-        <p><strong>Offsite Emergency Contact:</strong> ${event.extendedProps.offsiteEmergencyContact}</p>
-        <p><strong>Mitchell Sponsor:</strong> ${event.extendedProps.mitchellSponsor}</p>
-        <p><strong>Type of Use:</strong> ${event.extendedProps.exclusiveUse}</p>
-        <p><strong>Organization Type:</strong> ${event.extendedProps.organizationStatus}</p>
-        <p><strong>Status:</strong> ${event.extendedProps.status}</p>
+        <p><strong>Arrival Time:</strong> ${details.arrivalTime}</p>
+        <p><strong>Departure Time:</strong> ${details.departureTime}</p>
+        <p><strong>Guest Name:</strong> ${details.guestName}</p>
+        <p><strong>Guest Email:</strong> ${details.guestEmail}</p>
+        <p><strong>Number of Guests:</strong> ${details.numGuests}</p>
+        <p><strong>Catering Option:</strong> ${details.cateringOption}</p>
+        <p><strong>Special Requests:</strong> ${details.specialRequests || 'None'}</p>
+        <p><strong>Mobility Impaired:</strong> ${details.mobilityImpaired}</p>
+        <p><strong>Event Manager Contact:</strong> ${details.eventManagerContact}</p>
+        <p><strong>Offsite Emergency Contact:</strong> ${details.offsiteEmergencyContact}</p>
+        <p><strong>Mitchell Sponsor:</strong> ${details.mitchellSponsor}</p>
+        <p><strong>Type of Use:</strong> ${details.exclusiveUse}</p>
+        <p><strong>Organization Type:</strong> ${details.organizationStatus}</p>
+        <p><strong>Status:</strong> ${details.status}</p>
     `;
 
     modal.style.display = 'block';
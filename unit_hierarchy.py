@@ -0,0 +1,46 @@
+from typing import Dict, Iterable, Set
+from sqlalchemy import select, union
+from models import db, Unit, UnitClosure
+
+def rebuild_unit_closure() -> None:
+    """
+    Recompute the unit_closure table from Unit.parent_unit_id. Units are few
+    and change rarely, so the whole table is rebuilt after any unit change.
+    The caller commits.
+    """
+    parents = dict(db.session.query(Unit.id, Unit.parent_unit_id).all())
+    rows = []
+    for unit_id in parents:
+        ancestor_id, depth, seen = unit_id, 0, set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            rows.append({'ancestor_id': ancestor_id, 'descendant_id': unit_id, 'depth': depth})
+            seen.add(ancestor_id)
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+
+    UnitClosure.query.delete()
+    if rows:
+        db.session.execute(UnitClosure.__table__.insert(), rows)
+
+def related_unit_ids_select(unit_id: int):
+    """
+    SELECT of the unit itself plus all its ancestors and descendants: the units
+    that cannot be booked at the same time as it.
+    """
+    return union(
+        select(UnitClosure.descendant_id).where(UnitClosure.ancestor_id == unit_id),
+        select(UnitClosure.ancestor_id).where(UnitClosure.descendant_id == unit_id)
+    )
+
+def related_unit_ids(unit_ids: Iterable[int]) -> Dict[int, Set[int]]:
+    """Map each unit to the set of units it conflicts with, itself included."""
+    unit_ids = list(unit_ids)
+    related = {unit_id: {unit_id} for unit_id in unit_ids}
+    pairs = db.session.query(UnitClosure.ancestor_id, UnitClosure.descendant_id).filter(
+        UnitClosure.ancestor_id.in_(unit_ids) | UnitClosure.descendant_id.in_(unit_ids)
+    ).all()
+    for ancestor_id, descendant_id in pairs:
+        if ancestor_id in related:
+            related[ancestor_id].add(descendant_id)
+        if descendant_id in related:
+            related[descendant_id].add(ancestor_id)
+    return related
@@ -0,0 +1,62 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from flask_login import UserMixin
+from sqlalchemy import event
+from models import db, User
+from metrics import record_cache_lookup
+
+class CachedUser(UserMixin):
+    """Detached, read-only copy of a User row for Flask-Login's current_user."""
+
+    def __init__(self, id: int, username: str):
+        self.id = id
+        self.username = username
+
+    def __repr__(self):
+        return f"<CachedUser {self.id} {self.username}>"
+
+class UserCache:
+    """
+    Process-local cache of the users loaded on every authenticated request.
+    There are only a couple of users and they rarely change, so entries live
+    for `ttl` seconds and are dropped explicitly whenever a User row changes.
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._entries: Dict[int, Tuple[CachedUser, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[CachedUser]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[1] > now:
+                record_cache_lookup('user', True)
+                return entry[0]
+        record_cache_lookup('user', False)
+
+        row = db.session.query(User.id, User.username).filter(User.id == user_id).first()
+        if row is None:
+            self.invalidate(user_id)
+            return None
+        user = CachedUser(row.id, row.username)
+        with self._lock:
+            self._entries[user_id] = (user, now + self.ttl)
+        return user
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Drop one user, or every user when no id is given."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+user_cache = UserCache()
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_changed_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
@@ -0,0 +1,11 @@
+"""
+Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+The database is initialised once by the gunicorn master (see gunicorn.conf.py),
+not on import, so workers only load the app.
+"""
+from application import create_app, init_db
+
+app = create_app()
+
+__all__ = ['app', 'init_db']